@@ -3,7 +3,7 @@
 PROJECT:        AAU TEACHER REVIEW BOT
 VERSION:        12.0.0 — MongoDB Atlas Edition
 DATE:           FEBRUARY 2026
-FRAMEWORK:      python-telegram-bot v20.x+ | Flask | MongoDB Atlas (pymongo)
+FRAMEWORK:      python-telegram-bot v20.x+ | aiohttp | MongoDB Atlas (pymongo)
 
 BUGS FIXED FROM v11.0:
   🐛 BUG 1 — handler_teacher was unreachable:
@@ -50,13 +50,17 @@ MONGODB CHANGES:
 
 import logging
 import asyncio
-import uuid
+import functools
+import gc
+import secrets
 import os
 import html
 import re
-import threading
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set, Tuple
+import sys
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
 
 # ── Telegram ──────────────────────────────────────────────────────────────────
 from telegram import (
@@ -75,15 +79,25 @@ from telegram.ext import (
     filters,
     CallbackQueryHandler,
     ConversationHandler,
+    Defaults,
+    TypeHandler,
+    BaseUpdateProcessor,
 )
 from telegram.constants import ParseMode
-from telegram.error import BadRequest, Forbidden
+from telegram.error import BadRequest, Forbidden, TelegramError
+from telegram.request import HTTPXRequest
+import orjson
 
 # ── MongoDB (Motor = async pymongo driver) ────────────────────────────────────
+# Motor runs blocking pymongo calls on a thread pool sized at import (default 5 × CPUs).
+# This bot's queries are tiny, so a few workers beat dozens fighting over the GIL.
+os.environ.setdefault("MOTOR_MAX_WORKERS", "4")
 import motor.motor_asyncio
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 
-# ── Flask keep-alive ──────────────────────────────────────────────────────────
-from flask import Flask
+# ── Keep-alive web server (shares the bot's event loop) ───────────────────────
+from aiohttp import web
 
 # ==============================================================================
 # ⚙️  CONFIGURATION  — edit these values, or set as Render env vars
@@ -102,15 +116,32 @@ MONGO_DB   = "teacher_review_bot"
 RAW_CHANNEL_ID = "1003881172658"
 CHANNEL_ID = int(f"-100{RAW_CHANNEL_ID}") if not RAW_CHANNEL_ID.startswith("-") else int(RAW_CHANNEL_ID)
 
+# Render injects $PORT for the keep-alive server; parsed here so a bad value fails at startup
+PORT       = int(os.environ.get("PORT", 8080))
+
 SUBJECTS_PER_PAGE     = 6
 MAX_REVIEWS_PER_HOUR  = 5
 MAX_PROFANITY_STRIKES = 3
+CONVERSATION_TIMEOUT  = 1800   # seconds of inactivity before a half-written review is dropped
+VOTE_EDIT_DELAY       = 0.8    # seconds a post's vote buttons wait to coalesce a burst into one edit
+CACHE_REFRESH_SECS    = 300    # re-read ban/member sets to pick up writes from other instances
+TOP_CACHE_TTL         = 60     # seconds /top rankings are served from memory (cleared on new reviews)
+CTX_CACHE_SIZE        = 4096   # most-recently-used deep-link/pending contexts kept in memory
+BROADCAST_RATE        = 25     # messages per second — under Telegram's ~30/s bot-wide limit
+BROADCAST_INFLIGHT    = 10     # concurrent send_message calls during a broadcast
+ADMIN_SEND_INFLIGHT   = 4      # concurrent review cards in flight to the single admin chat
+UPDATE_CONCURRENCY    = 32     # updates handled at once (still one at a time per user)
+BOT_POOL_SIZE         = 64     # outbound Bot API connections — kept above UPDATE_CONCURRENCY
+POLL_TIMEOUT          = 50     # seconds Telegram holds each getUpdates open when there's nothing new
+UPDATE_BACKLOG        = 1000   # dispatched-but-unfinished updates (running or queued per user)
+UPDATE_QUEUE_SIZE     = 100    # fetched-but-undispatched updates before polling waits for room
 
 # ==============================================================================
 # 🚫  PROFANITY FILTER
 # ==============================================================================
 
-PROFANITY_SET: Set[str] = {
+# Already lower-case; immutable so the compiled pattern below can never drift from it
+PROFANITY_SET: FrozenSet[str] = frozenset({
     # English
     "idiot", "stupid", "dumb", "moron", "retard", "imbecile", "fool",
     "bastard", "asshole", "bitch", "crap", "fuck", "shit", "piss",
@@ -121,15 +152,49 @@ PROFANITY_SET: Set[str] = {
     "shilegna", "baldeg", "gmatam", "neger", "wend",
     # Afaan Oromo
     "gaafii", "waraana",
-}
+})
+
+def _trie_pattern(words: FrozenSet[str]) -> str:
+    """Alternation factored by shared prefix ("b(?:aldeg|astard|itch)"), so the regex
+    engine tests each character position against one branch per letter instead of
+    retrying every word — the DFA-like shape of an Aho-Corasick scan, in plain re."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        if len(alts) == 1 and "" not in node:
+            return alts[0]
+        group = "(?:" + "|".join(alts) + ")"
+        return group + "?" if "" in node else group
+
+    return emit(trie)
+
+# One case-insensitive pass over the raw text: no lower() copy, no token list.
+# The lookarounds give the same whole-word semantics as splitting on \w+.
+_PROFANITY_RE = re.compile(
+    r"(?<!\w)" + _trie_pattern(PROFANITY_SET) + r"(?!\w)",
+    re.IGNORECASE,
+)
 
 def contains_profanity(text: str) -> bool:
-    return any(w in PROFANITY_SET for w in re.findall(r"\w+", text.lower()))
+    return _PROFANITY_RE.search(text) is not None
 
 # ==============================================================================
 # 📝  STRINGS  (zero channel/identity references)
 # ==============================================================================
 
+# Horizontal rules, built once instead of "─" * n inside every render
+HR_WIDE   = "─" * 34   # admin review card
+HR        = "─" * 32   # /search results
+HR_NARROW = "─" * 30   # /stats panel
+
 class S:
     WELCOME = (
         "📋 <b>Teacher Review Bot</b>\n\n"
@@ -197,6 +262,25 @@ class S:
         "🔔 You will receive a notification here once your review is approved."
     )
     MSG_MATERIALS       = "📂 <b>Study Materials</b>\n\nJoin the archive channel to access all resources."
+    ADMIN_HDR_NEW      = "📩 <b>NEW REVIEW</b>"
+    ADMIN_HDR_THREAD   = "🧵 <b>ADDITIONAL REVIEW (Thread)</b>"
+    ADMIN_PARENT_LINE  = "🔗 <b>Thread Parent:</b> <code>{}</code>\n"
+    ADMIN_REVIEW       = (
+        "{header}\n"
+        f"{HR_WIDE}\n"
+        "👤 <b>User:</b> {display} (<code>{uid}</code>)\n"
+        "🏫 <b>Stream:</b>  {stream}\n"
+        "📅 <b>Year:</b>    {year}\n"
+        "📚 <b>Subject:</b> {subject}\n"
+        "👨‍🏫 <b>Teacher:</b> {teacher}\n"
+        "⭐ <b>Rating:</b>  {stars} ({rating}/5)\n"
+        "{parent_line}"
+        "🆔 <b>Ref ID:</b>  <code>{ref}</code>\n"
+        f"{HR_WIDE}\n"
+        "💬 <b>Review:</b>\n{content}"
+    )
+    POST_HDR_NEW       = "📢 <b>TEACHER REVIEW</b>"
+    POST_HDR_THREAD    = "📝 <b>ADDITIONAL FEEDBACK</b>"
     ADMIN_REJECT_PROMPT = (
         "📋 <b>Select a rejection reason</b>\n"
         "The student will receive a polite, specific message explaining the issue."
@@ -206,119 +290,141 @@ class S:
 # 📊  ACADEMIC DATABASE
 # ==============================================================================
 
-ACADEMIC_DB: Dict[str, Dict[str, List[str]]] = {
+ACADEMIC_DB: Dict[str, Dict[str, Tuple[str, ...]]] = {
     "🔬 Freshman Natural Science": {
-        "Year 1 (Freshman)": [
+        "Year 1 (Freshman)": (
             "Logic & Critical Thinking", "General Psychology", "Geography of Ethiopia",
             "Communicative English I", "Freshman Mathematics", "General Physics",
             "Emerging Technology", "Social Anthropology", "History of Ethiopia",
             "Civics & Moral Education", "Global Trends", "Entrepreneurship",
             "Economics", "Communicative English II", "Applied Mathematics I",
             "Computer Programming (Python)", "Physical Fitness",
-        ]
+        )
     },
     "🌍 Freshman Social Science": {
-        "Year 1 (Freshman)": [
+        "Year 1 (Freshman)": (
             "Logic & Critical Thinking", "General Psychology", "Civics & Moral Education",
             "Global Trends", "Entrepreneurship", "Economics", "Social Anthropology",
             "Geography of Ethiopia", "Communicative English I", "Emerging Technology",
             "Mathematics for Social Science", "Communicative English II",
             "History of Ethiopia", "Physical Fitness",
-        ]
+        )
     },
     "⚙️ Pre-Engineering & Engineering": {
-        "Year 1 (Pre-Engineering Common)": [
+        "Year 1 (Pre-Engineering Common)": (
             "Applied Math I", "Applied Math II", "Engineering Mechanics I (Statics)",
             "Engineering Mechanics II (Dynamics)", "Engineering Drawing",
             "Workshop Practice", "Introduction to Computing",
             "Communicative English", "Civics & Ethics", "Logic",
-        ],
-        "Year 2 (Mechanical Eng)": [
+        ),
+        "Year 2 (Mechanical Eng)": (
             "Applied Math III", "Strength of Materials", "Thermodynamics I",
             "Machine Drawing", "Materials Science", "Fluid Mechanics",
             "Thermodynamics II", "Manufacturing Processes",
             "Kinematics of Machinery", "Electrical Circuits",
-        ],
-        "Year 2 (Software Eng)": [
+        ),
+        "Year 2 (Software Eng)": (
             "Applied Math III", "Physics for Engineers", "Programming Fundamentals",
             "Discrete Mathematics", "Digital Logic Design", "Probability & Statistics",
             "Data Structures & Algorithms", "Object-Oriented Programming",
             "Database Systems", "Computer Organization",
-        ],
-        "Year 2 (Electrical Eng)": [
+        ),
+        "Year 2 (Electrical Eng)": (
             "Applied Math III", "Network Analysis", "Electronic Circuits I",
             "Digital Logic", "Electromagnetic Fields", "Signals and Systems",
             "Electrical Workshop", "Object Oriented Programming",
-        ],
-        "Year 2 (Civil Eng)": [
+        ),
+        "Year 2 (Civil Eng)": (
             "Theory of Structures I", "Surveying I", "Engineering Geology",
             "Construction Materials", "Strength of Materials",
             "Applied Math III", "Hydraulics I",
-        ],
-        "Year 3 (General)": [
+        ),
+        "Year 3 (General)": (
             "Internship / Industrial Practice", "Research Methods",
             "Entrepreneurship for Engineers", "Operating Systems",
             "Computer Networks", "Software Engineering", "Machine Design",
             "Heat Transfer", "Control Systems", "Reinforced Concrete",
-        ],
+        ),
     },
     "🩺 Medicine & Health Sciences": {
-        "Year 1 (Pre-Medicine)": [
+        "Year 1 (Pre-Medicine)": (
             "General Biology", "General Chemistry", "General Physics",
             "Introduction to Medicine", "Communicative English",
             "Medical Ethics", "Civics", "Information Technology",
-        ],
-        "Year 2 (Pre-Clinical)": [
+        ),
+        "Year 2 (Pre-Clinical)": (
             "Human Anatomy I", "Human Anatomy II", "Human Physiology I",
             "Human Physiology II", "Medical Biochemistry I", "Medical Biochemistry II",
             "Histology & Embryology", "Public Health", "Microbiology",
-        ],
-        "Year 3 (Clinical Start)": [
+        ),
+        "Year 3 (Clinical Start)": (
             "Pathology I", "Pathology II", "Pharmacology I", "Pharmacology II",
             "Introduction to Clinical Medicine", "Immunology",
             "Parasitology", "Epidemiology",
-        ],
-        "Other Health (Nursing / Pharma)": [
+        ),
+        "Other Health (Nursing / Pharma)": (
             "Fundamentals of Nursing", "Pharmaceutics", "Medicinal Chemistry",
             "Clinical Nursing", "Health Service Management",
-        ],
+        ),
     },
     "⚖️ Law & Governance": {
-        "Year 1": [
+        "Year 1": (
             "Introduction to Law", "Sociology of Law", "Legal History",
             "Constitutional Law I", "Logic", "English for Lawyers",
-        ],
-        "Year 2": [
+        ),
+        "Year 2": (
             "Constitutional Law II", "Law of Contracts I", "Law of Contracts II",
             "Family Law", "Criminal Law I", "Criminal Law II", "Law of Persons",
-        ],
-        "Year 3": [
+        ),
+        "Year 3": (
             "Law of Traders", "Business Organizations", "Administrative Law",
             "Property Law", "Law of Sales", "Human Rights Law",
             "Public International Law",
-        ],
+        ),
     },
     "💼 Business & Economics": {
-        "Year 1": [
+        "Year 1": (
             "Principles of Management", "Introduction to Economics",
             "Business Mathematics", "Communicative English", "Civics",
             "Logic", "Financial Accounting I",
-        ],
-        "Year 2": [
+        ),
+        "Year 2": (
             "Microeconomics", "Macroeconomics", "Cost Accounting",
             "Business Statistics", "Organizational Behavior",
             "Marketing Management", "Financial Accounting II",
             "Business Law", "Managerial Economics",
-        ],
-        "Year 3": [
+        ),
+        "Year 3": (
             "Financial Management", "Human Resource Management",
             "Operations Management", "International Trade",
             "Strategic Management", "Research Methods",
             "Entrepreneurship", "Investment Analysis",
-        ],
+        ),
     },
 }
 
+# Frozen views of the catalogue — shared by keyboard builders without per-call list() copies
+STREAMS:         Tuple[str, ...]            = tuple(ACADEMIC_DB)
+YEARS_BY_STREAM: Dict[str, Tuple[str, ...]] = {
+    stream: tuple(years) for stream, years in ACADEMIC_DB.items()
+}
+
+# O(1) membership for validating subject callbacks against the chosen stream/year
+SUBJECTS_BY_YEAR: Dict[Tuple[str, str], FrozenSet[str]] = {
+    (stream, year): frozenset(subjects)
+    for stream, years in ACADEMIC_DB.items()
+    for year, subjects in years.items()
+}
+
+# Subject lists pre-cut into keyboard pages, so a "Next ➡️" click is a tuple index
+SUBJECT_PAGES: Dict[Tuple[str, str], Tuple[Tuple[str, ...], ...]] = {
+    (stream, year): tuple(
+        subjects[i:i + SUBJECTS_PER_PAGE] for i in range(0, len(subjects), SUBJECTS_PER_PAGE)
+    )
+    for stream, years in ACADEMIC_DB.items()
+    for year, subjects in years.items()
+}
+
 # BUG FIX 2: removed duplicate "Anatomy" key
 EMOJI_MAP = {
     "Physics": "⚛️", "Math": "🧮", "Calculus": "∫", "Chemistry": "🧪",
@@ -334,15 +440,41 @@ EMOJI_MAP = {
     "Pharmacology": "💊", "Pathology": "🔬", "Nursing": "🩺",
 }
 
+# Keywords lower-cased once; every known subject resolved once at import
+_EMOJI_LOOKUP: Tuple[Tuple[str, str], ...] = tuple((kw.lower(), em) for kw, em in EMOJI_MAP.items())
+
+@functools.lru_cache(maxsize=512)
+def _match_emoji(name: str) -> str:
+    low = name.lower()
+    return next((em for kw, em in _EMOJI_LOOKUP if kw in low), "📚")
+
+SUBJECT_EMOJI: Dict[str, str] = {
+    subj: _match_emoji(subj)
+    for years in ACADEMIC_DB.values()
+    for subjects in years.values()
+    for subj in subjects
+}
+
 def subject_emoji(name: str) -> str:
-    for kw, em in EMOJI_MAP.items():
-        if kw.lower() in name.lower():
-            return em
-    return "📚"
+    return SUBJECT_EMOJI.get(name) or _match_emoji(name)
+
+def esc(text: str) -> str:
+    """html.escape, skipped outright when the text has nothing to escape (the usual case).
+    Five C-level `in` scans beat both a regex probe and a str.translate table here."""
+    if "&" in text or "<" in text or ">" in text or '"' in text or "'" in text:
+        return html.escape(text)
+    return text
+
+# Only six renderings exist (0..5), so index instead of multiplying per call
+STARS: Tuple[str, ...] = tuple("⭐" * i + "☆" * (5 - i) for i in range(6))
 
 def stars_str(rating: int) -> str:
-    r = max(0, min(5, rating))
-    return "⭐" * r + "☆" * (5 - r)
+    return STARS[max(0, min(5, rating))]
+
+# cb_rating's reply for every possible rating, built once (PROMPT_CONTENT is long)
+RATING_SET_MSGS: Tuple[str, ...] = tuple(
+    f"⭐ <b>Rating set: {stars_str(i)} ({i}/5)</b>\n\n{S.PROMPT_CONTENT}" for i in range(6)
+)
 
 # ==============================================================================
 # 💾  DATABASE  — MongoDB Atlas (Motor async driver)
@@ -356,121 +488,300 @@ class Database:
     """
 
     def __init__(self):
-        client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
-        mdb    = client[MONGO_DB]
+        # The one client for the process — every collection below shares its pool
+        self._client = motor.motor_asyncio.AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=50,
+            minPoolSize=5,          # keep warm sockets so the first query after idle skips the TLS dial
+            maxIdleTimeMS=30_000,
+        )
+        mdb          = self._client[MONGO_DB]
 
         # Collections — one per logical domain
         self._bans       = mdb["bans"]        # {_id: uid}
-        self._contexts   = mdb["contexts"]    # {_id: key, data: {...}}
-        self._votes      = mdb["votes"]       # {_id: msg_id_str, up, down, voters:{}}
+        self._contexts   = mdb["contexts"]    # {_id: key, data: {...}}  deep-link contexts
+        self._pending    = mdb["pending_ctx"] # {_id: "pending_<rev>", data: {...}}  awaiting review
+        self._votes      = mdb["votes"]       # {_id: msg_id, up, down, deep}  (+ legacy voters:{})
+        self._voters     = mdb["vote_voters"] # {_id: "msg_id:uid", dir}
         self._reviews    = mdb["reviews"]     # approved reviews
         self._users      = mdb["users"]       # {_id: uid_str, name, username, joined}
         self._violations = mdb["violations"]  # {_id: uid_str, count}
-        self._ratelimits = mdb["ratelimits"]  # {_id: uid_str, timestamps:[]}
+        self._ratelimits = mdb["ratelimits"]  # {_id: uid, timestamps:[Date], last_ts, ok}
         self._members    = mdb["members"]     # {_id: uid}  approved members
 
-        # In-memory caches for hot reads (rebuilt on startup via async init)
-        self._banned_cache:  Set[int] = set()
-        self._members_cache: Set[int] = set()
+        # In-memory caches for hot reads (rebuilt on startup via async init).
+        # Both are immutable snapshots swapped on write, so is_banned() and the
+        # /health route never observe a set mid-mutation.
+        self._banned_cache:  FrozenSet[int] = frozenset()
+        self._members_cache: FrozenSet[int] = frozenset()
 
-    async def init(self):
-        """Must be awaited once at startup to warm caches and create indexes."""
-        # Warm ban cache
-        async for doc in self._bans.find({}, {"_id": 1}):
-            self._banned_cache.add(doc["_id"])
+        # Users already in the users collection — repeat /start skips the upsert
+        self._registered: Set[int] = set()
 
-        # Warm member cache
-        async for doc in self._members.find({}, {"_id": 1}):
-            self._members_cache.add(doc["_id"])
+        # Write-through LRU of contexts (deep-link taps, admin button presses)
+        self._ctx_cache: "OrderedDict[str, dict]" = OrderedDict()
 
-        # Create indexes for fast lookups
-        await self._reviews.create_index([("teacher", 1)])
-        await self._reviews.create_index([("subject", 1)])
-        await self._contexts.create_index([("_id", 1)])
+        # /top rankings: (kind, n) → (monotonic expiry, rows); dropped by add_review()
+        self._top_cache: Dict[Tuple[str, int], Tuple[float, List[dict]]] = {}
+
+    async def init(self):
+        """Must be awaited once at startup to warm caches and create indexes."""
+        await self.refresh_caches()
+        await self._migrate_pending()
+        await self._migrate_int_ids()
+        await self._drop_legacy_indexes()
+        self._registered = {int(x) for x in await self._users.distinct("_id")}
+
+        # Create indexes for fast lookups. The full reviews set is _id_ (keyed by channel
+        # msg_id, see add_review), the two (field, rating) compounds and the teacher text
+        # index; anything in _LEGACY_REVIEW_INDEXES is dropped above.
+        # (field, rating) also serves plain teacher/subject lookups via the prefix, and
+        # lets the /top pipelines feed $group from an ordered index scan
+        await self._reviews.create_index([("teacher", 1), ("rating", 1)])
+        await self._reviews.create_index([("subject", 1), ("rating", 1)])
+        # Word-level teacher search; "none" = no stemming/stop words (names aren't English)
+        await self._reviews.create_index([("teacher", "text")], default_language="none")
+        # Rate-limit rows vanish an hour after the user's last accepted submission
+        await self._ratelimits.create_index("last_ts", expireAfterSeconds=3600)
 
         logging.info("DB: cache warmed. Banned=%d Members=%d",
                      len(self._banned_cache), len(self._members_cache))
 
+    async def _migrate_pending(self):
+        """One-off move of pending reviews that predate the pending_ctx collection."""
+        legacy = await self._contexts.find({"_id": {"$regex": "^pending_"}}).to_list(length=None)
+        if not legacy:
+            return
+        await self._pending.bulk_write(
+            [UpdateOne({"_id": d["_id"]}, {"$setOnInsert": {"data": d["data"]}}, upsert=True)
+             for d in legacy],
+            ordered=False,
+        )
+        await self._contexts.delete_many({"_id": {"$in": [d["_id"] for d in legacy]}})
+        logging.info("DB: moved %d pending reviews to pending_ctx.", len(legacy))
+
+    # Single-field indexes from older deployments; each is a prefix of a (field, rating)
+    # compound index below, so they only cost writes
+    _LEGACY_REVIEW_INDEXES = ("teacher_1", "subject_1")
+
+    async def _drop_legacy_indexes(self):
+        """One-off: drop superseded reviews indexes that are still present."""
+        present = await self._reviews.index_information()
+        for name in self._LEGACY_REVIEW_INDEXES:
+            if name not in present:
+                continue
+            try:
+                await self._reviews.drop_index(name)
+                logging.info("DB: dropped redundant reviews index %s.", name)
+            except OperationFailure:
+                pass   # another instance dropped it first
+
+    async def _migrate_int_ids(self):
+        """One-off: votes/ratelimits used to be keyed by str(id); they are int-keyed now."""
+        legacy = await self._votes.find({"_id": {"$type": "string"}}).to_list(length=None)
+        if legacy:
+            await self._votes.bulk_write(
+                [UpdateOne({"_id": int(d.pop("_id"))}, {"$setOnInsert": d}, upsert=True)
+                 for d in legacy],
+                ordered=False,
+            )
+            await self._votes.delete_many({"_id": {"$type": "string"}})
+            logging.info("DB: re-keyed %d vote documents by int msg_id.", len(legacy))
+        # Rate-limit rows only matter for an hour — dropping the old ones is enough
+        await self._ratelimits.delete_many({"_id": {"$type": "string"}})
+
+    async def refresh_caches(self):
+        """Reload the ban/member snapshots; also run periodically from the job queue."""
+        # One distinct() reply each instead of a cursor walk
+        self._banned_cache  = frozenset(await self._bans.distinct("_id"))
+        self._members_cache = frozenset(await self._members.distinct("_id"))
+
+    def close(self):
+        """Release pooled connections; called once on shutdown (SIGTERM/SIGINT)."""
+        self._client.close()
+        logging.info("DB: connection pool closed.")
+
     # ── BAN ───────────────────────────────────────────────────────────────────
 
     def is_banned(self, uid: int) -> bool:
         return uid in self._banned_cache
 
     async def ban(self, uid: int):
-        self._banned_cache.add(uid)
-        await self._bans.update_one({"_id": uid}, {"$set": {"_id": uid}}, upsert=True)
+        self._banned_cache = self._banned_cache | {uid}
+        await self._bans.update_one(
+            {"_id": uid}, {"$setOnInsert": {"ts": datetime.now(timezone.utc)}}, upsert=True
+        )
 
     async def unban(self, uid: int):
-        self._banned_cache.discard(uid)
+        self._banned_cache = self._banned_cache - {uid}
         await self._bans.delete_one({"_id": uid})
 
     # ── CONTEXT (deep-link keys + pending reviews) ────────────────────────────
 
+    def _ctx_remember(self, key: str, data: dict):
+        self._ctx_cache[key] = data
+        self._ctx_cache.move_to_end(key)
+        if len(self._ctx_cache) > CTX_CACHE_SIZE:
+            self._ctx_cache.popitem(last=False)
+
+    def _ctx_coll(self, key: str):
+        # Pending reviews live apart so they can be counted from collection metadata
+        return self._pending if key.startswith("pending_") else self._contexts
+
     async def set_ctx(self, key: str, data: dict):
-        await self._contexts.update_one(
+        await self._ctx_coll(key).update_one(
             {"_id": key},
-            {"$set": {"_id": key, "data": data}},
+            {"$set": {"data": data}},
             upsert=True,
         )
+        self._ctx_remember(key, data)
+
+    async def set_ctx_many(self, items: Dict[str, dict]):
+        """set_ctx for several keys in one bulk_write round trip (per collection)."""
+        batches: Tuple[List[UpdateOne], List[UpdateOne]] = ([], [])   # (contexts, pending)
+        for k, v in items.items():
+            batches[k.startswith("pending_")].append(
+                UpdateOne({"_id": k}, {"$set": {"data": v}}, upsert=True)
+            )
+        for coll, batch in zip((self._contexts, self._pending), batches):
+            if batch:
+                await coll.bulk_write(batch, ordered=False)
+        for k, v in items.items():
+            self._ctx_remember(k, v)
 
     async def get_ctx(self, key: str) -> Optional[dict]:
-        doc = await self._contexts.find_one({"_id": key})
-        return doc["data"] if doc else None
+        data = self._ctx_cache.get(key)
+        if data is not None:
+            self._ctx_cache.move_to_end(key)
+            return data
+        # Misses aren't cached: the key may be written later (or by another instance)
+        doc = await self._ctx_coll(key).find_one({"_id": key})
+        if not doc:
+            return None
+        self._ctx_remember(key, doc["data"])
+        return doc["data"]
+
+    async def del_ctx(self, key: str):
+        self._ctx_cache.pop(key, None)
+        await self._ctx_coll(key).delete_one({"_id": key})
 
     # ── VOTES  (per-user, prevents repeat voting) ─────────────────────────────
 
+    async def init_votes(self, msg_id: int, deep_link: str):
+        """Record the post's deep link so vote re-renders don't read it back out of the old markup."""
+        await self._votes.update_one(
+            {"_id": msg_id}, {"$set": {"deep": deep_link}}, upsert=True
+        )
+
     async def cast_vote(self, msg_id: int, uid: int, direction: str) -> Tuple[bool, dict]:
         """
-        Returns (changed, {up, down}).
-        Uses MongoDB's atomic findOneAndUpdate for race-safe voting.
+        Returns (changed, {up, down, deep}); deep is None for posts from before it was stored.
+        Each voter is their own tiny document in vote_voters, so a vote touches
+        O(1) bytes no matter how many people have already voted on the post.
         """
-        mid  = str(msg_id)
-        uidk = str(uid)
+        uidk = str(uid)   # only for the legacy voters map — field names must be strings
 
-        # Read current state
-        doc = await self._votes.find_one({"_id": mid})
-        if not doc:
-            doc = {"_id": mid, "up": 0, "down": 0, "voters": {}}
-
-        voters = doc.get("voters", {})
-        prev   = voters.get(uidk)
-
-        if prev == direction:
-            return False, doc          # nothing to change
-
-        # Calculate new counts
-        up   = doc.get("up",   0)
-        down = doc.get("down", 0)
-
-        if prev == "up":   up   = max(0, up - 1)
-        if prev == "down": down = max(0, down - 1)
-        if direction == "up":   up   += 1
-        if direction == "down": down += 1
-
-        voters[uidk] = direction
-
-        await self._votes.update_one(
-            {"_id": mid},
-            {"$set": {"up": up, "down": down, "voters": voters}},
+        # Record this voter's choice; the pre-image is their previous one
+        old = await self._voters.find_one_and_update(
+            {"_id": f"{msg_id}:{uid}"},
+            {"$set": {"dir": direction}},
+            projection={"dir": 1},
             upsert=True,
+            return_document=False,
         )
-        return True, {"up": up, "down": down}
+        was = old["dir"] if old else None
+        if was == direction:
+            return False, {}
+
+        # First vote here — the voter may still sit in the post's legacy voters map
+        prev = {"$literal": was} if was else f"$voters.{uidk}"
+
+        def counter(side: str) -> dict:
+            # side += (new vote is side) - (old vote was side), floored at 0
+            gain = 1 if direction == side else 0
+            return {"$max": [0, {"$add": [
+                {"$ifNull": [f"${side}", 0]},
+                gain,
+                {"$cond": [{"$eq": [prev, side]}, -1, 0]},
+            ]}]}
+
+        # One atomic pipeline update on the counters; also moves a legacy voter out of
+        # the map. The pre-image gives the counts our write started from.
+        before = await self._votes.find_one_and_update(
+            {"_id": msg_id},
+            [
+                {"$set": {"up": counter("up"), "down": counter("down")}},
+                {"$unset": f"voters.{uidk}"},
+            ],
+            projection={"up": 1, "down": 1, "deep": 1, f"voters.{uidk}": 1},
+            upsert=True,
+            return_document=False,
+        ) or {}
+
+        if not was:
+            was = before.get("voters", {}).get(uidk)
+        votes = {"up": before.get("up", 0), "down": before.get("down", 0), "deep": before.get("deep")}
+        if was == direction:
+            return False, votes        # legacy vote, same direction
+        votes[direction] += 1
+        if was in ("up", "down"):
+            votes[was] = max(0, votes[was] - 1)
+        return True, votes
+
+    async def vote_counts(self, msg_id: int) -> dict:
+        doc = await self._votes.find_one({"_id": msg_id}, {"up": 1, "down": 1}) or {}
+        return {"up": doc.get("up", 0), "down": doc.get("down", 0)}
 
     # ── APPROVED REVIEWS ──────────────────────────────────────────────────────
 
     async def add_review(self, review: dict):
-        await self._reviews.insert_one(review)
+        """Keyed by the channel message id, so a retried approval can't store a review twice."""
+        await self._reviews.update_one(
+            {"_id": review["msg_id"]}, {"$setOnInsert": review}, upsert=True
+        )
+        self._top_cache.clear()
+
+    async def _cached_top(self, kind: str, n: int, pipeline: List[dict]) -> List[dict]:
+        key   = (kind, n)
+        entry = self._top_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        rows = await self._reviews.aggregate(pipeline).to_list(length=n)
+        self._top_cache[key] = (time.monotonic() + TOP_CACHE_TTL, rows)
+        return rows
+
+    # Only what /search renders; content is cut server-side to one char past the
+    # 150-char snippet so the caller can still tell whether to add "…"
+    _SEARCH_FIELDS = {
+        "_id": 0, "teacher": 1, "subject": 1, "rating": 1,
+        "content": {"$substrCP": ["$content", 0, 151]},
+    }
 
     async def search(self, query: str) -> List[dict]:
         q = query.strip()
+
+        # Searched as one quoted phrase: every term must match, in order, and user
+        # input can't smuggle in $text operators (-negation, extra quotes, escapes).
+        # Whole-word matches come straight off the text index, best score first.
+        terms = " ".join(q.replace("\\", " ").replace('"', " ").split())
+        if terms:
+            hits = await self._reviews.find(
+                {"$text": {"$search": f'"{terms}"'}},
+                {**self._SEARCH_FIELDS, "score": {"$meta": "textScore"}},
+            ).sort([("score", {"$meta": "textScore"})]).to_list(length=50)
+            if hits:
+                return hits
+
+        # Partial names ("Abe" for "Abebe") still need the substring scan
         cursor = self._reviews.find(
             {"teacher": {"$regex": re.escape(q), "$options": "i"}},
-            {"_id": 0}
+            self._SEARCH_FIELDS,
         )
         return await cursor.to_list(length=50)
 
     async def top_teachers(self, n: int = 5) -> List[dict]:
         pipeline = [
+            {"$sort": {"teacher": 1}},
             {"$group": {
                 "_id":     "$teacher",
                 "avg":     {"$avg": "$rating"},
@@ -479,12 +790,13 @@ class Database:
             }},
             {"$sort": {"avg": -1}},
             {"$limit": n},
-            {"$project": {"teacher": "$_id", "avg": 1, "count": 1, "subject": 1, "_id": 0}},
+            {"$replaceWith": {"teacher": "$_id", "avg": "$avg", "count": "$count", "subject": "$subject"}},
         ]
-        return await self._reviews.aggregate(pipeline).to_list(length=n)
+        return await self._cached_top("teachers", n, pipeline)
 
     async def toughest_courses(self, n: int = 5) -> List[dict]:
         pipeline = [
+            {"$sort": {"subject": 1}},
             {"$group": {
                 "_id":   "$subject",
                 "avg":   {"$avg": "$rating"},
@@ -492,16 +804,18 @@ class Database:
             }},
             {"$sort": {"avg": 1}},      # ascending = lowest rated first
             {"$limit": n},
-            {"$project": {"subject": "$_id", "avg": 1, "count": 1, "_id": 0}},
+            {"$replaceWith": {"subject": "$_id", "avg": "$avg", "count": "$count"}},
         ]
-        return await self._reviews.aggregate(pipeline).to_list(length=n)
+        return await self._cached_top("courses", n, pipeline)
 
     async def review_count(self) -> int:
-        return await self._reviews.count_documents({})
+        return await self._reviews.estimated_document_count()
 
     # ── USERS ─────────────────────────────────────────────────────────────────
 
     async def register(self, user: User):
+        if user.id in self._registered:
+            return
         uid = str(user.id)
         await self._users.update_one(
             {"_id": uid},
@@ -509,17 +823,20 @@ class Database:
                 "_id":      uid,
                 "name":     user.first_name,
                 "username": user.username or "",
-                "joined":   datetime.now().isoformat(),
+                "joined":   datetime.now(timezone.utc),
             }},
             upsert=True,
         )
+        self._registered.add(user.id)
 
-    async def all_user_ids(self) -> List[int]:
-        docs = await self._users.find({}, {"_id": 1}).to_list(length=100_000)
-        return [int(d["_id"]) for d in docs]
+    async def iter_user_ids(self, batch: int = 1000) -> AsyncIterator[int]:
+        """Stream ids off a server-side cursor — sending starts with the first batch,
+        and memory stays at one batch however many users there are."""
+        async for doc in self._users.find({}, {"_id": 1}).batch_size(batch):
+            yield int(doc["_id"])
 
     async def user_count(self) -> int:
-        return await self._users.count_documents({})
+        return await self._users.estimated_document_count()
 
     # ── APPROVED MEMBERS ──────────────────────────────────────────────────────
 
@@ -527,11 +844,15 @@ class Database:
         return uid in self._members_cache or uid == ADMIN_ID
 
     async def add_approved_member(self, uid: int):
-        self._members_cache.add(uid)
-        await self._members.update_one({"_id": uid}, {"$set": {"_id": uid}}, upsert=True)
+        if uid in self._members_cache:
+            return
+        self._members_cache = self._members_cache | {uid}
+        await self._members.update_one(
+            {"_id": uid}, {"$setOnInsert": {"ts": datetime.now(timezone.utc)}}, upsert=True
+        )
 
     async def member_count(self) -> int:
-        return await self._members.count_documents({})
+        return await self._members.estimated_document_count()
 
     # ── VIOLATIONS ────────────────────────────────────────────────────────────
 
@@ -552,33 +873,35 @@ class Database:
         Returns True if user may submit another review right now.
         BUG FIX 3: checked per draft, not per batch.
         """
-        uid_str = str(uid)
-        now     = datetime.now()
-        cutoff  = now - timedelta(hours=1)
-
-        doc = await self._ratelimits.find_one({"_id": uid_str})
-        timestamps = doc.get("timestamps", []) if doc else []
-
-        # Keep only the last hour
-        recent = [t for t in timestamps if datetime.fromisoformat(t) > cutoff]
-
-        if len(recent) >= MAX_REVIEWS_PER_HOUR:
-            return False
+        now    = datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=1)
 
-        recent.append(now.isoformat())
-        await self._ratelimits.update_one(
-            {"_id": uid_str},
-            {"$set": {"timestamps": recent}},
+        # One round trip, evaluated server-side: drop stamps older than an hour
+        # (legacy ISO strings never compare $gt a Date, so they go too), then
+        # append `now` only if the window still has room.
+        doc = await self._ratelimits.find_one_and_update(
+            {"_id": uid},
+            [
+                {"$set": {"timestamps": {"$filter": {
+                    "input": {"$ifNull": ["$timestamps", []]},
+                    "cond":  {"$gt": ["$$this", cutoff]},
+                }}}},
+                {"$set": {"ok": {"$lt": [{"$size": "$timestamps"}, MAX_REVIEWS_PER_HOUR]}}},
+                {"$set": {
+                    "timestamps": {"$cond": ["$ok", {"$concatArrays": ["$timestamps", [now]]}, "$timestamps"]},
+                    "last_ts":    {"$cond": ["$ok", now, "$last_ts"]},
+                }},
+            ],
+            projection={"ok": 1},
             upsert=True,
+            return_document=True,
         )
-        return True
+        return doc["ok"]
 
     # ── STATS ─────────────────────────────────────────────────────────────────
 
     async def pending_count(self) -> int:
-        return await self._contexts.count_documents(
-            {"_id": {"$regex": "^pending_"}}
-        )
+        return await self._pending.estimated_document_count()
 
 
 # Singleton — initialised asynchronously in main()
@@ -590,10 +913,11 @@ db = Database()
 
 class Draft:
     __slots__ = ("id", "stream", "year", "subject", "teacher",
-                 "rating", "content", "is_additional", "parent_msg_id", "ts")
+                 "rating", "content", "is_additional", "parent_msg_id", "ts",
+                 "subject_html", "teacher_html", "content_html")
 
     def __init__(self):
-        self.id:            str            = str(uuid.uuid4())[:8]
+        self.id:            str            = secrets.token_hex(4)
         self.stream:        str            = ""
         self.year:          str            = ""
         self.subject:       str            = ""
@@ -603,20 +927,26 @@ class Draft:
         self.is_additional: bool           = False
         self.parent_msg_id: Optional[int]  = None
         self.ts:            datetime       = datetime.now()
+        # HTML-escaped copies, filled in alongside the raw fields so renders don't re-escape
+        self.subject_html:  str            = ""
+        self.teacher_html:  str            = ""
+        self.content_html:  str            = ""
 
 
 class Session:
+    __slots__ = ("uid", "draft", "drafts", "subject_page", "subject_pages")
+
     def __init__(self, uid: int):
-        self.uid:              int            = uid
-        self.draft:            Optional[Draft] = None
-        self.drafts:           List[Draft]    = []
-        self.subject_page:     int            = 0
-        self.current_subjects: List[str]      = []
+        self.uid:           int                          = uid
+        self.draft:         Optional[Draft]              = None
+        self.drafts:        List[Draft]                  = []
+        self.subject_page:  int                          = 0
+        self.subject_pages: Tuple[Tuple[str, ...], ...] = ()
 
     def new_draft(self) -> Draft:
-        self.draft           = Draft()
-        self.subject_page    = 0
-        self.current_subjects = []
+        self.draft         = Draft()
+        self.subject_page  = 0
+        self.subject_pages = ()
         return self.draft
 
     def commit_draft(self):
@@ -655,25 +985,26 @@ def session(uid: int) -> Session:
 # 🎨  KEYBOARD BUILDERS
 # ==============================================================================
 
-def kb_reply(items: List[str], cols: int = 1) -> ReplyKeyboardMarkup:
+def kb_reply(items: Sequence[str], cols: int = 1) -> ReplyKeyboardMarkup:
     rows = [items[i:i+cols] for i in range(0, len(items), cols)]
     return ReplyKeyboardMarkup(rows, resize_keyboard=True, one_time_keyboard=True)
 
 def kb_main() -> ReplyKeyboardMarkup:
     return kb_reply([S.BTN_WRITE, S.BTN_MATERIALS])
 
-def kb_subjects(subjects: List[str], page: int) -> InlineKeyboardMarkup:
-    start = page * SUBJECTS_PER_PAGE
-    chunk = subjects[start:start + SUBJECTS_PER_PAGE]
-    total = (len(subjects) + SUBJECTS_PER_PAGE - 1) // SUBJECTS_PER_PAGE
+# Output depends only on (pages, page) and PTB markups are immutable, so each page of each
+# year is built once; the catalogue has a few dozen such pages in total.
+@functools.lru_cache(maxsize=128)
+def kb_subjects(pages: Tuple[Tuple[str, ...], ...], page: int) -> InlineKeyboardMarkup:
+    total = len(pages)
     rows  = []
-    for s in chunk:
+    for s in pages[page]:
         rows.append([InlineKeyboardButton(f"{subject_emoji(s)} {s}", callback_data=f"subj|{s}")])
     nav = []
     if page > 0:
         nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"spage|{page-1}"))
     nav.append(InlineKeyboardButton(f"📄 {page+1}/{total}", callback_data="spage|noop"))
-    if start + SUBJECTS_PER_PAGE < len(subjects):
+    if page + 1 < total:
         nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"spage|{page+1}"))
     rows.append(nav)
     rows.append([InlineKeyboardButton("❌ Cancel", callback_data="conv|cancel")])
@@ -690,7 +1021,7 @@ def kb_batch() -> ReplyKeyboardMarkup:
 def kb_manage(drafts: List[Draft]) -> InlineKeyboardMarkup:
     rows = []
     for i, d in enumerate(drafts):
-        short = html.escape(d.teacher[:22] + ("…" if len(d.teacher) > 22 else ""))
+        short = esc(d.teacher[:22] + ("…" if len(d.teacher) > 22 else ""))
         rows.append([
             InlineKeyboardButton(f"✏️ Edit #{i+1}: {short}", callback_data=f"dedit|{i}"),
             InlineKeyboardButton(f"🗑️ Delete #{i+1}",         callback_data=f"ddel|{i}"),
@@ -708,28 +1039,39 @@ def kb_admin(uid: int, rev_id: str) -> InlineKeyboardMarkup:
         [InlineKeyboardButton("🔨 Ban User",    callback_data=f"ban|{uid}|{rev_id}")],
     ])
 
+REJECT_REASONS: Tuple[Tuple[str, str], ...] = (
+    ("🤬 Insulting / Aggressive Language", "insulting"),
+    ("📏 Too Short / Lacks Detail",         "tooshort"),
+    ("😕 Unclear / Hard to Understand",     "unclear"),
+    ("🔗 Irrelevant to the Teacher",        "irrelevant"),
+    ("♻️ Duplicate / Already Submitted",   "duplicate"),
+    ("🚫 Community Policy Violation",       "policy"),
+)
+
 def kb_reject(uid: int, rev_id: str) -> InlineKeyboardMarkup:
-    reasons = [
-        ("🤬 Insulting / Aggressive Language", "insulting"),
-        ("📏 Too Short / Lacks Detail",         "tooshort"),
-        ("😕 Unclear / Hard to Understand",     "unclear"),
-        ("🔗 Irrelevant to the Teacher",        "irrelevant"),
-        ("♻️ Duplicate / Already Submitted",   "duplicate"),
-        ("🚫 Community Policy Violation",       "policy"),
-    ]
-    rows = [[InlineKeyboardButton(label, callback_data=f"rr|{uid}|{rev_id}|{code}")]
-            for label, code in reasons]
-    rows.append([InlineKeyboardButton("⬅️ Back", callback_data=f"rback|{uid}|{rev_id}")])
+    ref  = f"{uid}|{rev_id}"   # the only per-card part of every callback
+    rows = [[InlineKeyboardButton(label, callback_data=f"rr|{ref}|{code}")]
+            for label, code in REJECT_REASONS]
+    rows.append([InlineKeyboardButton("⬅️ Back", callback_data=f"rback|{ref}")])
     return InlineKeyboardMarkup(rows)
 
-def kb_channel_post(rev_id: str, up: int, down: int, deep_link: str) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton(f"👍 {up}",   callback_data=f"vup|{rev_id}"),
-            InlineKeyboardButton(f"👎 {down}", callback_data=f"vdn|{rev_id}"),
-        ],
-        [InlineKeyboardButton("➕ Add More About This Teacher", url=deep_link)],
-    ])
+def kb_channel_post(rev_id: str, up: int, down: int, deep_link: Optional[str]) -> InlineKeyboardMarkup:
+    rows = [[
+        InlineKeyboardButton(f"👍 {up}",   callback_data=f"vup|{rev_id}"),
+        InlineKeyboardButton(f"👎 {down}", callback_data=f"vdn|{rev_id}"),
+    ]]
+    if deep_link:
+        rows.append([InlineKeyboardButton("➕ Add More About This Teacher", url=deep_link)])
+    return InlineKeyboardMarkup(rows)
+
+# Static keyboards — built once at import (PTB markups are immutable, so sharing is safe)
+KB_MAIN:    ReplyKeyboardMarkup            = kb_main()
+KB_RATING:  InlineKeyboardMarkup           = kb_rating()
+KB_BATCH:   ReplyKeyboardMarkup            = kb_batch()
+KB_STREAMS: ReplyKeyboardMarkup            = kb_reply(STREAMS + (S.BTN_CANCEL,))
+KB_YEARS:   Dict[str, ReplyKeyboardMarkup] = {
+    stream: kb_reply(years + (S.BTN_CANCEL,)) for stream, years in YEARS_BY_STREAM.items()
+}
 
 # Rejection messages — polite and specific
 REJECT_MSG: Dict[str, str] = {
@@ -779,45 +1121,46 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await db.register(user)
 
     if db.is_banned(user.id):
-        await update.message.reply_text(S.ERR_BANNED, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(S.ERR_BANNED)
         return ConversationHandler.END
 
-    _sessions[user.id] = Session(user.id)
-    sess = session(user.id)
+    # /start always begins clean; a session is only needed if a deep link opens a draft.
+    # Plain /start used to leave an empty Session behind for every user, forever.
+    _sessions.pop(user.id, None)
 
     args = context.args
     if args and args[0].startswith("add_"):
         ctx_id = args[0][4:]
         data   = await db.get_ctx(ctx_id)
         if data:
-            d               = sess.new_draft()
+            d               = session(user.id).new_draft()
             d.stream        = data.get("stream", "")
             d.year          = data.get("year", "")
             d.subject       = data.get("subject", "")
             d.teacher       = data.get("teacher", "")
+            d.subject_html  = esc(d.subject)
+            d.teacher_html  = esc(d.teacher)
             d.parent_msg_id = data.get("parent_msg_id")
             d.is_additional = True
             await update.message.reply_text(
                 S.WELCOME_DEEP.format(
-                    teacher=html.escape(d.teacher),
-                    subject=html.escape(d.subject),
+                    teacher=d.teacher_html,
+                    subject=d.subject_html,
                 ),
-                reply_markup=kb_rating(),
-                parse_mode=ParseMode.HTML,
+                reply_markup=KB_RATING,
             )
             return ST_RATING
         else:
             await update.message.reply_text(
                 "⚠️ <b>This link has expired.</b> Starting fresh.",
-                parse_mode=ParseMode.HTML,
             )
 
-    await update.message.reply_text(S.WELCOME, reply_markup=kb_main(), parse_mode=ParseMode.HTML)
+    await update.message.reply_text(S.WELCOME, reply_markup=KB_MAIN)
     return ConversationHandler.END
 
 
 async def cmd_materials(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(S.MSG_MATERIALS, parse_mode=ParseMode.HTML)
+    await update.message.reply_text(S.MSG_MATERIALS)
     return ConversationHandler.END
 
 
@@ -826,15 +1169,13 @@ async def handler_start_review(update: Update, context: ContextTypes.DEFAULT_TYP
     await db.register(user)
 
     if db.is_banned(user.id):
-        await update.message.reply_text(S.ERR_BANNED, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(S.ERR_BANNED)
         return ConversationHandler.END
 
     session(user.id).new_draft()
-    streams = list(ACADEMIC_DB.keys())
     await update.message.reply_text(
         S.PROMPT_STREAM,
-        reply_markup=kb_reply(streams + [S.BTN_CANCEL]),
-        parse_mode=ParseMode.HTML,
+        reply_markup=KB_STREAMS,
     )
     return ST_STREAM
 
@@ -843,17 +1184,15 @@ async def handler_stream(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text
     if text == S.BTN_CANCEL:
         return await do_cancel(update, context)
-    if text not in ACADEMIC_DB:
-        await update.message.reply_text(S.ERR_INVALID, parse_mode=ParseMode.HTML)
+    if text not in KB_YEARS:
+        await update.message.reply_text(S.ERR_INVALID)
         return ST_STREAM
 
     sess = session(update.effective_user.id)
     sess.draft.stream = text
-    years = list(ACADEMIC_DB[text].keys())
     await update.message.reply_text(
         S.PROMPT_YEAR,
-        reply_markup=kb_reply(years + [S.BTN_CANCEL]),
-        parse_mode=ParseMode.HTML,
+        reply_markup=KB_YEARS[text],
     )
     return ST_YEAR
 
@@ -863,28 +1202,24 @@ async def handler_year(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if text == S.BTN_CANCEL:
         return await do_cancel(update, context)
 
-    sess   = session(update.effective_user.id)
-    stream = sess.draft.stream
-    if text not in ACADEMIC_DB.get(stream, {}):
-        await update.message.reply_text(S.ERR_INVALID, parse_mode=ParseMode.HTML)
+    sess  = session(update.effective_user.id)
+    pages = SUBJECT_PAGES.get((sess.draft.stream, text))   # validates and fetches in one probe
+    if pages is None:
+        await update.message.reply_text(S.ERR_INVALID)
         return ST_YEAR
 
-    sess.draft.year       = text
-    subjects              = ACADEMIC_DB[stream][text]
-    sess.current_subjects = subjects
-    sess.subject_page     = 0
-    total = (len(subjects) + SUBJECTS_PER_PAGE - 1) // SUBJECTS_PER_PAGE
+    sess.draft.year    = text
+    sess.subject_pages = pages
+    sess.subject_page  = 0
 
     # Send the inline subject keyboard as its own message
     await update.message.reply_text(
         S.PROMPT_SUBJECT,
         reply_markup=ReplyKeyboardRemove(),
-        parse_mode=ParseMode.HTML,
     )
     await update.message.reply_text(
-        f"📄 <b>Page 1 of {total}</b> — select your subject:",
-        reply_markup=kb_subjects(subjects, 0),
-        parse_mode=ParseMode.HTML,
+        f"📄 <b>Page 1 of {len(pages)}</b> — select your subject:",
+        reply_markup=kb_subjects(pages, 0),
     )
     return ST_SUBJECT
 
@@ -894,19 +1229,19 @@ async def handler_year(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def cb_subject_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    _, val = query.data.split("|", 1)
+    val = query.data.partition("|")[2]
     if val == "noop":
         return ST_SUBJECT
 
-    page     = int(val)
-    sess     = session(query.from_user.id)
+    page  = int(val)
+    sess  = session(query.from_user.id)
+    pages = sess.subject_pages
+    if not 0 <= page < len(pages):
+        return ST_SUBJECT   # stale keyboard from an earlier draft
     sess.subject_page = page
-    subjects = sess.current_subjects
-    total    = (len(subjects) + SUBJECTS_PER_PAGE - 1) // SUBJECTS_PER_PAGE
     await query.edit_message_text(
-        f"📄 <b>Page {page+1} of {total}</b> — select your subject:",
-        reply_markup=kb_subjects(subjects, page),
-        parse_mode=ParseMode.HTML,
+        f"📄 <b>Page {page+1} of {len(pages)}</b> — select your subject:",
+        reply_markup=kb_subjects(pages, page),
     )
     return ST_SUBJECT
 
@@ -919,21 +1254,24 @@ async def cb_subject_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
     but since no new message was sent, the ConversationHandler never advanced.
     """
     query   = update.callback_query
-    await query.answer()
-    subject = query.data.split("|", 1)[1]
+    subject = query.data.partition("|")[2]
     sess    = session(query.from_user.id)
-    sess.draft.subject = subject
+    if subject not in SUBJECTS_BY_YEAR.get((sess.draft.stream, sess.draft.year), ()):
+        await query.answer(S.ERR_INVALID, show_alert=True)
+        return ST_SUBJECT
+
+    await query.answer()
+    sess.draft.subject      = subject
+    sess.draft.subject_html = esc(subject)
 
     # Acknowledge the selection in the inline message
     await query.edit_message_text(
-        f"✅ <b>Subject selected:</b> {html.escape(subject)}",
-        parse_mode=ParseMode.HTML,
+        f"✅ <b>Subject selected:</b> {sess.draft.subject_html}",
     )
     # Send a NEW message prompting for teacher name — this is what the user replies to
     await context.bot.send_message(
         query.from_user.id,
         S.PROMPT_TEACHER,
-        parse_mode=ParseMode.HTML,
     )
     return ST_TEACHER
 
@@ -943,8 +1281,8 @@ async def cb_conv_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     uid   = query.from_user.id
     _sessions.pop(uid, None)
-    await query.edit_message_text("❌ <b>Cancelled.</b>", parse_mode=ParseMode.HTML)
-    await context.bot.send_message(uid, "Use the menu to start again:", reply_markup=kb_main())
+    await query.edit_message_text("❌ <b>Cancelled.</b>")
+    await context.bot.send_message(uid, "Use the menu to start again:", reply_markup=KB_MAIN)
     return ConversationHandler.END
 
 
@@ -953,15 +1291,15 @@ async def cb_conv_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handler_teacher(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text.strip()
     if len(text) < 3:
-        await update.message.reply_text(S.ERR_SHORT_NAME, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(S.ERR_SHORT_NAME)
         return ST_TEACHER
 
     sess = session(update.effective_user.id)
-    sess.draft.teacher = text
+    sess.draft.teacher      = text
+    sess.draft.teacher_html = esc(text)
     await update.message.reply_text(
-        f"👤 <b>{html.escape(text)}</b>\n\n{S.PROMPT_RATING}",
-        reply_markup=kb_rating(),
-        parse_mode=ParseMode.HTML,
+        f"👤 <b>{sess.draft.teacher_html}</b>\n\n{S.PROMPT_RATING}",
+        reply_markup=KB_RATING,
     )
     return ST_RATING
 
@@ -969,13 +1307,12 @@ async def handler_teacher(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def cb_rating(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query  = update.callback_query
     await query.answer()
-    rating = int(query.data.split("|")[1])
+    rating = int(query.data.partition("|")[2])
+    if not 1 <= rating <= 5:
+        return ST_RATING
     sess   = session(query.from_user.id)
     sess.draft.rating = rating
-    await query.edit_message_text(
-        f"⭐ <b>Rating set: {stars_str(rating)} ({rating}/5)</b>\n\n{S.PROMPT_CONTENT}",
-        parse_mode=ParseMode.HTML,
-    )
+    await query.edit_message_text(RATING_SET_MSGS[rating])
     return ST_CONTENT
 
 
@@ -985,7 +1322,7 @@ async def handler_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
     sess = session(uid)
 
     if len(text) < 30:
-        await update.message.reply_text(S.ERR_SHORT_REVIEW, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(S.ERR_SHORT_REVIEW)
         return ST_CONTENT
 
     # Profanity check
@@ -995,23 +1332,24 @@ async def handler_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if strikes >= MAX_PROFANITY_STRIKES:
             await db.ban(uid)
             msg += "\n\n🚫 <b>You have been permanently banned due to repeated violations.</b>"
-            await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
+            await update.message.reply_text(msg)
             _sessions.pop(uid, None)
             return ConversationHandler.END
         msg += f"\n\n⚠️ Strike <b>{strikes}/{MAX_PROFANITY_STRIKES}</b>."
-        await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(msg)
         return ST_CONTENT
 
-    sess.draft.content = text
+    sess.draft.content      = text
+    sess.draft.content_html = esc(text)
     sess.commit_draft()
 
     # Deep-link reviews auto-submit immediately
     if sess.drafts and sess.drafts[-1].is_additional:
-        return await do_submit(uid, update, context)
+        return await do_submit(update.effective_user, update, context)
 
     # Show draft summary + batch menu
     lines   = [
-        f"<b>#{i+1}</b> {html.escape(d.teacher)} — {stars_str(d.rating)} ({d.rating}/5)"
+        f"<b>#{i+1}</b> {d.teacher_html} — {stars_str(d.rating)} ({d.rating}/5)"
         for i, d in enumerate(sess.drafts)
     ]
     summary = "\n".join(lines)
@@ -1019,8 +1357,7 @@ async def handler_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"{S.SUCCESS_DRAFT_SAVED}\n\n"
         f"📊 <b>Your Drafts ({len(sess.drafts)}):</b>\n{summary}\n\n"
         "👇 <b>What next?</b>",
-        reply_markup=kb_batch(),
-        parse_mode=ParseMode.HTML,
+        reply_markup=KB_BATCH,
     )
     return ST_BATCH
 
@@ -1033,16 +1370,15 @@ async def handler_batch(update: Update, context: ContextTypes.DEFAULT_TYPE):
     sess   = session(uid)
 
     if choice == S.BTN_SUBMIT:
-        return await do_submit(uid, update, context)
+        return await do_submit(update.effective_user, update, context)
 
     if choice == S.BTN_MANAGE:
         if not sess.drafts:
-            await update.message.reply_text("No drafts yet!", parse_mode=ParseMode.HTML)
+            await update.message.reply_text("No drafts yet!")
             return ST_BATCH
         await update.message.reply_text(
             "📋 <b>Manage Your Drafts:</b>",
             reply_markup=kb_manage(sess.drafts),
-            parse_mode=ParseMode.HTML,
         )
         return ST_MANAGE
 
@@ -1052,117 +1388,121 @@ async def handler_batch(update: Update, context: ContextTypes.DEFAULT_TYPE):
         last_stream = sess.drafts[-1].stream
         sess.new_draft()
         sess.draft.stream = last_stream
-        years = list(ACADEMIC_DB[last_stream].keys())
         await update.message.reply_text(
             f"🔄 <b>Stream:</b> {last_stream}\n\n{S.PROMPT_YEAR}",
-            reply_markup=kb_reply(years + [S.BTN_CANCEL]),
-            parse_mode=ParseMode.HTML,
+            reply_markup=KB_YEARS[last_stream],
         )
         return ST_YEAR
 
-    await update.message.reply_text(S.ERR_INVALID, parse_mode=ParseMode.HTML)
+    await update.message.reply_text(S.ERR_INVALID)
     return ST_BATCH
 
 
 # ── Draft management callbacks ─────────────────────────────────────────────────
 
+async def _draft_submit(query, context: ContextTypes.DEFAULT_TYPE, sess: Session, arg: str):
+    await query.edit_message_text("⏳ Submitting…")
+    return await do_submit(query.from_user, None, context)
+
+
+async def _draft_add(query, context: ContextTypes.DEFAULT_TYPE, sess: Session, arg: str):
+    await query.edit_message_text("✅ Starting new review…")
+    if sess.drafts:
+        last_stream = sess.drafts[-1].stream
+        sess.new_draft()
+        sess.draft.stream = last_stream
+        await context.bot.send_message(
+            query.from_user.id,
+            f"🔄 <b>Stream:</b> {last_stream}\n\n{S.PROMPT_YEAR}",
+            reply_markup=KB_YEARS[last_stream],
+        )
+    return ST_YEAR
+
+
+async def _draft_delete(query, context: ContextTypes.DEFAULT_TYPE, sess: Session, arg: str):
+    sess.delete(int(arg))
+    if not sess.drafts:
+        _sessions.pop(query.from_user.id, None)
+        await query.edit_message_text("🗑️ All drafts deleted.")
+        return ConversationHandler.END
+    await query.edit_message_text(
+        "🗑️ Draft deleted. Remaining:",
+        reply_markup=kb_manage(sess.drafts),
+    )
+    return ST_MANAGE
+
+
+async def _draft_edit(query, context: ContextTypes.DEFAULT_TYPE, sess: Session, arg: str):
+    if sess.pop_for_edit(int(arg)):
+        await query.edit_message_text(
+            f"✏️ <b>Editing:</b> {sess.draft.teacher_html}\n\nPlease rewrite your feedback:",
+        )
+        return ST_CONTENT
+    return ST_MANAGE
+
+
+# cb_manage_drafts prefix (before "|") → handler(query, context, session, index-or-"")
+_DRAFT_ACTIONS = {
+    "dsubmit": _draft_submit,
+    "dadd":    _draft_add,
+    "ddel":    _draft_delete,
+    "dedit":   _draft_edit,
+}
+
+
 async def cb_manage_drafts(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """BUG FIX 4: pattern simplified to r'^d(edit|del|submit|add)' to correctly match all callbacks."""
     query = update.callback_query
     await query.answer()
-    data  = query.data
-    uid   = query.from_user.id
-    sess  = session(uid)
-
-    if data == "dsubmit":
-        await query.edit_message_text("⏳ Submitting…", parse_mode=ParseMode.HTML)
-        return await do_submit(uid, None, context)
-
-    if data == "dadd":
-        await query.edit_message_text("✅ Starting new review…", parse_mode=ParseMode.HTML)
-        if sess.drafts:
-            last_stream = sess.drafts[-1].stream
-            sess.new_draft()
-            sess.draft.stream = last_stream
-            years = list(ACADEMIC_DB[last_stream].keys())
-            await context.bot.send_message(
-                uid,
-                f"🔄 <b>Stream:</b> {last_stream}\n\n{S.PROMPT_YEAR}",
-                reply_markup=kb_reply(years + [S.BTN_CANCEL]),
-                parse_mode=ParseMode.HTML,
-            )
-        return ST_YEAR
-
-    if data.startswith("ddel|"):
-        idx = int(data.split("|")[1])
-        sess.delete(idx)
-        if not sess.drafts:
-            await query.edit_message_text("🗑️ All drafts deleted.", parse_mode=ParseMode.HTML)
-            return ConversationHandler.END
-        await query.edit_message_text(
-            "🗑️ Draft deleted. Remaining:",
-            reply_markup=kb_manage(sess.drafts),
-            parse_mode=ParseMode.HTML,
-        )
+    prefix, _, arg = query.data.partition("|")
+    handler = _DRAFT_ACTIONS.get(prefix)
+    if handler is None:
         return ST_MANAGE
+    return await handler(query, context, session(query.from_user.id), arg)
 
-    if data.startswith("dedit|"):
-        idx = int(data.split("|")[1])
-        if sess.pop_for_edit(idx):
-            await query.edit_message_text(
-                f"✏️ <b>Editing:</b> {html.escape(sess.draft.teacher)}\n\nPlease rewrite your feedback:",
-                parse_mode=ParseMode.HTML,
-            )
-            return ST_CONTENT
 
-    return ST_MANAGE
+# ── Submit all drafts ──────────────────────────────────────────────────────────
 
+# Shared by every do_submit — all review cards land in the same admin chat
+_admin_send_gate = asyncio.Semaphore(ADMIN_SEND_INFLIGHT)
 
-# ── Submit all drafts ──────────────────────────────────────────────────────────
 
 async def do_submit(
-    uid: int,
+    user: User,
     update: Optional[Update],
     context: ContextTypes.DEFAULT_TYPE,
 ):
+    uid  = user.id
     sess = session(uid)
 
     if not sess.drafts:
         if update:
-            await update.message.reply_text(S.ERR_NO_DATA, parse_mode=ParseMode.HTML)
+            await update.message.reply_text(S.ERR_NO_DATA)
         return ConversationHandler.END
 
-    # Get display name
-    try:
-        tg_user = await context.bot.get_chat(uid)
-        display = tg_user.first_name or "Student"
-    except Exception:
-        display = "Student"
+    # Display name straight from the triggering update — no get_chat round trip
+    safe_display = esc(user.first_name or "Student")
 
     if update:
         await update.message.reply_text(
             "⏳ <b>Transmitting to admin…</b>",
             reply_markup=ReplyKeyboardRemove(),
-            parse_mode=ParseMode.HTML,
         )
 
-    submitted = 0
-    for draft in sess.drafts:
+    # Snapshot: the loop awaits Mongo per draft, and the list must not shift underneath it
+    drafts:  List[Draft]     = list(sess.drafts)
+    queued:  List[Draft]     = []
+    pending: Dict[str, dict] = {}
+    limited: bool            = False
+    for draft in drafts:
         # BUG FIX 3: rate limit checked per draft, not once per batch
         allowed = await db.rate_limit_ok(uid)
         if not allowed:
-            try:
-                await context.bot.send_message(
-                    uid,
-                    S.ERR_RATE_LIMIT + f"\n\n✅ <b>{submitted}</b> review(s) were sent before the limit.",
-                    parse_mode=ParseMode.HTML,
-                )
-            except Exception:
-                pass
+            limited = True
             break
 
-        # Save structured pending data (no text-parsing on approve)
-        await db.set_ctx(f"pending_{draft.id}", {
+        # Structured pending data (no text-parsing on approve)
+        pending[f"pending_{draft.id}"] = {
             "stream":        draft.stream,
             "year":          draft.year,
             "subject":       draft.subject,
@@ -1172,53 +1512,75 @@ async def do_submit(
             "parent_msg_id": draft.parent_msg_id,
             "is_additional": draft.is_additional,
             "user_id":       uid,
+        }
+        queued.append(draft)
+
+    # Every admin card's buttons need its pending payload — write the batch in one go first
+    if pending:
+        await db.set_ctx_many(pending)
+
+    async def _send(draft: Draft) -> bool:
+        admin_text = S.ADMIN_REVIEW.format_map({
+            "header":      S.ADMIN_HDR_THREAD if draft.is_additional else S.ADMIN_HDR_NEW,
+            "display":     safe_display,
+            "uid":         uid,
+            "stream":      esc(draft.stream),
+            "year":        esc(draft.year),
+            "subject":     draft.subject_html,
+            "teacher":     draft.teacher_html,
+            "stars":       stars_str(draft.rating),
+            "rating":      draft.rating,
+            "parent_line": S.ADMIN_PARENT_LINE.format(draft.parent_msg_id) if draft.parent_msg_id else "",
+            "ref":         draft.id,
+            "content":     draft.content_html,
         })
 
-        s_str       = stars_str(draft.rating)
-        header      = "🧵 <b>ADDITIONAL REVIEW (Thread)</b>" if draft.is_additional else "📩 <b>NEW REVIEW</b>"
-        parent_line = f"🔗 <b>Thread Parent:</b> <code>{draft.parent_msg_id}</code>\n" if draft.parent_msg_id else ""
-
-        admin_text = (
-            f"{header}\n"
-            f"{'─'*34}\n"
-            f"👤 <b>User:</b> {html.escape(display)} (<code>{uid}</code>)\n"
-            f"🏫 <b>Stream:</b>  {html.escape(draft.stream)}\n"
-            f"📅 <b>Year:</b>    {html.escape(draft.year)}\n"
-            f"📚 <b>Subject:</b> {html.escape(draft.subject)}\n"
-            f"👨‍🏫 <b>Teacher:</b> {html.escape(draft.teacher)}\n"
-            f"⭐ <b>Rating:</b>  {s_str} ({draft.rating}/5)\n"
-            f"{parent_line}"
-            f"🆔 <b>Ref ID:</b>  <code>{draft.id}</code>\n"
-            f"{'─'*34}\n"
-            f"💬 <b>Review:</b>\n{html.escape(draft.content)}"
-        )
+        try:
+            async with _admin_send_gate:
+                await context.bot.send_message(
+                    chat_id=ADMIN_ID,
+                    text=admin_text,
+                    reply_markup=kb_admin(uid, draft.id),
+                )
+            return True
+        except TelegramError as exc:
+            logging.error("send_to_admin failed: %s", exc)
+            return False
+
+    # Independent round-trips to the admin chat — overlap them instead of paying each in turn.
+    # The shared gate keeps several students submitting at once from flooding that one chat.
+    submitted = sum(await asyncio.gather(*(_send(d) for d in queued)))
 
+    if limited:
         try:
             await context.bot.send_message(
-                chat_id=ADMIN_ID,
-                text=admin_text,
-                reply_markup=kb_admin(uid, draft.id),
-                parse_mode=ParseMode.HTML,
+                uid,
+                S.ERR_RATE_LIMIT + f"\n\n✅ <b>{submitted}</b> review(s) were sent before the limit.",
             )
-            submitted += 1
-        except Exception as exc:
-            logging.error("send_to_admin failed: %s", exc)
+        except TelegramError:
+            pass
 
     _sessions.pop(uid, None)
 
     try:
         await context.bot.send_message(
-            uid, S.SUCCESS_SUBMITTED, reply_markup=kb_main(), parse_mode=ParseMode.HTML
+            uid, S.SUCCESS_SUBMITTED, reply_markup=KB_MAIN
         )
-    except Exception:
+    except TelegramError:
         pass
     return ConversationHandler.END
 
 
+async def on_timeout(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Conversation went idle for CONVERSATION_TIMEOUT — free the abandoned session."""
+    if update.effective_user:
+        _sessions.pop(update.effective_user.id, None)
+
+
 async def do_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     _sessions.pop(update.effective_user.id, None)
     await update.message.reply_text(
-        "❌ <b>Cancelled.</b>", reply_markup=kb_main(), parse_mode=ParseMode.HTML
+        "❌ <b>Cancelled.</b>", reply_markup=KB_MAIN
     )
     return ConversationHandler.END
 
@@ -1226,6 +1588,18 @@ async def do_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # 🛡️  ADMIN CALLBACKS
 # ==============================================================================
 
+_REJECT_PROMPT_SUFFIX = "\n\n" + S.ADMIN_REJECT_PROMPT
+
+def admin_card(message) -> str:
+    """
+    The admin review card as HTML, minus any reject-reason prompt appended to it.
+    text_html (not .text) keeps the <b>/<code> markup and re-escapes user content,
+    so the card survives being re-sent with HTML parse mode. One partition()
+    scan replaces the old `in` + index() + replace() passes.
+    """
+    return message.text_html.partition(_REJECT_PROMPT_SUFFIX)[0]
+
+
 async def cb_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
 
@@ -1234,42 +1608,24 @@ async def cb_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     await query.answer()
-    parts  = query.data.split("|")
-    action = parts[0]
-
-    if action == "app":
-        uid, rev_id = int(parts[1]), parts[2]
-        await _approve(query, context, uid, rev_id)
-
-    elif action == "rej":
-        uid, rev_id = int(parts[1]), parts[2]
-        await query.edit_message_text(
-            query.message.text + "\n\n" + S.ADMIN_REJECT_PROMPT,
-            reply_markup=kb_reject(uid, rev_id),
-            parse_mode=ParseMode.HTML,
-        )
+    # "<action>|<uid>|<rev_id>[|<reason>]" — partition, no list per click
+    action, _, rest   = query.data.partition("|")
+    uid_s,  _, rev_id = rest.partition("|")
+    uid               = int(uid_s)
 
-    elif action == "rr":
-        uid, rev_id, reason = int(parts[1]), parts[2], parts[3]
-        await _reject(query, context, uid, rev_id, reason)
+    handler = _ADMIN_ACTIONS.get(action)
+    if handler:
+        await handler(query, context, uid, rev_id)
 
-    elif action == "rback":
-        uid, rev_id = int(parts[1]), parts[2]
-        clean = query.message.text.replace("\n\n" + S.ADMIN_REJECT_PROMPT, "")
-        await query.edit_message_text(
-            clean, reply_markup=kb_admin(uid, rev_id), parse_mode=ParseMode.HTML
-        )
 
-    elif action == "ban":
-        uid = int(parts[1])
-        if uid == ADMIN_ID:
-            await query.answer("Cannot ban yourself.", show_alert=True)
-            return
-        await db.ban(uid)
-        await query.edit_message_text(
-            query.message.text + "\n\n⛔ <b>USER BANNED</b>",
-            parse_mode=ParseMode.HTML,
-        )
+async def invite_link_for(bot, uid: int) -> Optional[str]:
+    """A fresh single-use channel invite per approval — never cached, since a reused
+    link may already have been redeemed (or forwarded)."""
+    try:
+        lnk = await bot.create_chat_invite_link(CHANNEL_ID, member_limit=1, name=f"R-{uid}")
+    except TelegramError:
+        return None
+    return lnk.invite_link
 
 
 async def _approve(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, rev_id: str):
@@ -1287,104 +1643,175 @@ async def _approve(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, rev_
     parent_msg_id = data.get("parent_msg_id")
     is_additional = data.get("is_additional", False)
 
-    header = "📝 <b>ADDITIONAL FEEDBACK</b>" if is_additional else "📢 <b>TEACHER REVIEW</b>"
-    post   = (
-        f"{header}\n\n"
-        f"{subject_emoji(subject)} <b>Subject:</b> {html.escape(subject)}\n"
-        f"👨‍🏫 <b>Teacher:</b> {html.escape(teacher)}\n"
-        f"⭐ <b>Rating:</b>  {stars_str(rating)} ({rating}/5)\n\n"
-        f"💬 <b>Feedback:</b>\n"
-        f"<i>{html.escape(content)}</i>"
-    )
-
-    ctx_uuid  = str(uuid.uuid4())[:10]
-    bot_info  = await context.bot.get_me()
-    deep_link = f"https://t.me/{bot_info.username}?start=add_{ctx_uuid}"
-
-    try:
-        sent = await context.bot.send_message(
-            chat_id=CHANNEL_ID,
-            text=post,
-            parse_mode=ParseMode.HTML,
-            reply_markup=kb_channel_post(rev_id, 0, 0, deep_link),
-            reply_to_message_id=parent_msg_id,
-        )
-    except Exception as exc:
-        logging.error("Channel post failed: %s", exc)
-        await query.message.reply_text(f"⚠️ Channel post failed: {exc}")
-        return
+    header = S.POST_HDR_THREAD if is_additional else S.POST_HDR_NEW
+    post   = "\n".join((
+        header,
+        "",
+        f"{subject_emoji(subject)} <b>Subject:</b> {esc(subject)}",
+        f"👨‍🏫 <b>Teacher:</b> {esc(teacher)}",
+        f"⭐ <b>Rating:</b>  {stars_str(rating)} ({rating}/5)",
+        "",
+        "💬 <b>Feedback:</b>",
+        f"<i>{esc(content)}</i>",
+    ))
+
+    posted = data.get("posted")
+    if posted:
+        # A previous approval got the post out but failed a write below — finish that
+        # one instead of publishing the review to the channel a second time
+        msg_id, ctx_id, deep_link = posted["msg_id"], posted["ctx_id"], posted["deep_link"]
+    else:
+        # bot.username comes from the get_me() PTB already did in Application.initialize()
+        ctx_id    = secrets.token_hex(5)
+        deep_link = f"https://t.me/{context.bot.username}?start=add_{ctx_id}"
 
-    # Save threading context so the next reply goes to the same thread
-    next_parent = parent_msg_id if parent_msg_id else sent.message_id
-    await db.set_ctx(ctx_uuid, {
-        "stream": stream, "year": year,
-        "subject": subject, "teacher": teacher,
-        "parent_msg_id": next_parent,
-    })
+        try:
+            sent = await context.bot.send_message(
+                chat_id=CHANNEL_ID,
+                text=post,
+                reply_markup=kb_channel_post(rev_id, 0, 0, deep_link),
+                reply_to_message_id=parent_msg_id,
+            )
+        except TelegramError as exc:
+            logging.error("Channel post failed: %s", exc)
+            await query.message.reply_text(f"⚠️ Channel post failed: {esc(str(exc))}")
+            return
 
-    # Persist the approved review
-    await db.add_review({
-        "teacher":   teacher,
-        "subject":   subject,
-        "stream":    stream,
-        "year":      year,
-        "rating":    rating,
-        "content":   content,
-        "timestamp": datetime.now().isoformat(),
-        "msg_id":    sent.message_id,
-    })
+        # Record the post on the pending payload before anything else can fail, so a
+        # retry from the admin card resumes here rather than re-posting
+        msg_id = sent.message_id
+        await db.set_ctx(f"pending_{rev_id}", {
+            **data, "posted": {"msg_id": msg_id, "ctx_id": ctx_id, "deep_link": deep_link},
+        })
 
-    # Unlock /search for this user
-    await db.add_approved_member(user_id)
+    # Everything below depends only on msg_id, not on each other: the invite link, the
+    # thread context for the next reply, the review itself, its vote doc and the /search
+    # unlock go out together — one round trip of latency instead of five. All of them
+    # are idempotent, so a retry after a partial failure is safe.
+    next_parent = parent_msg_id if parent_msg_id else msg_id
+    invite, *_ = await asyncio.gather(
+        invite_link_for(context.bot, user_id),
+        db.set_ctx(ctx_id, {
+            "stream": stream, "year": year,
+            "subject": subject, "teacher": teacher,
+            "parent_msg_id": next_parent,
+        }),
+        db.add_review({
+            "teacher":   teacher,
+            "subject":   subject,
+            "stream":    stream,
+            "year":      year,
+            "rating":    rating,
+            "content":   content,
+            "timestamp": datetime.now(timezone.utc),
+            "msg_id":    msg_id,
+        }),
+        db.init_votes(msg_id, deep_link),
+        db.add_approved_member(user_id),
+    )
+    invite = invite or "the review archive"
 
-    # Notify student with invite link
-    invite = "the review archive"
-    try:
-        lnk    = await context.bot.create_chat_invite_link(
-            CHANNEL_ID, member_limit=1, name=f"R-{user_id}"
-        )
-        invite = lnk.invite_link
-    except Exception:
-        pass
+    # Resolved — drop the pending payload only once the review is safely stored, so a
+    # failed write above leaves it (with the recorded post) for the admin to retry
+    await db.del_ctx(f"pending_{rev_id}")
 
-    try:
-        await context.bot.send_message(
-            user_id,
-            f"✅ <b>Your review has been approved!</b>\n\n🔑 <b>Your access link:</b>\n{invite}",
-            parse_mode=ParseMode.HTML,
-        )
-    except Exception:
-        pass
+    # Notify student with invite link and close out the admin card — independent round trips
+    async def _notify():
+        try:
+            await context.bot.send_message(
+                user_id,
+                f"✅ <b>Your review has been approved!</b>\n\n🔑 <b>Your access link:</b>\n{invite}",
+            )
+        except TelegramError:
+            pass
 
-    await query.edit_message_text(
-        query.message.text + "\n\n✅ <b>APPROVED & POSTED</b>",
-        parse_mode=ParseMode.HTML,
+    await asyncio.gather(
+        _notify(),
+        query.edit_message_text(admin_card(query.message) + "\n\n✅ <b>APPROVED &amp; POSTED</b>"),
     )
 
 
 async def _reject(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, rev_id: str, reason: str):
     msg = REJECT_MSG.get(reason, REJECT_MSG["policy"])
+    await db.del_ctx(f"pending_{rev_id}")
     try:
-        await context.bot.send_message(user_id, msg, parse_mode=ParseMode.HTML)
-    except Exception:
+        await context.bot.send_message(user_id, msg)
+    except TelegramError:
         pass
-    clean = query.message.text
-    if S.ADMIN_REJECT_PROMPT in clean:
-        clean = clean[: clean.index("\n\n" + S.ADMIN_REJECT_PROMPT)]
+    clean = admin_card(query.message)
     await query.edit_message_text(
         clean + f"\n\n❌ <b>REJECTED</b> — <i>{reason}</i>",
-        parse_mode=ParseMode.HTML,
     )
 
+
+async def _reject_prompt(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, rev_id: str):
+    await query.edit_message_text(
+        admin_card(query.message) + _REJECT_PROMPT_SUFFIX,
+        reply_markup=kb_reject(user_id, rev_id),
+    )
+
+
+async def _reject_reason(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, ref: str):
+    rev_id, _, reason = ref.partition("|")
+    await _reject(query, context, user_id, rev_id, reason)
+
+
+async def _reject_back(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, rev_id: str):
+    await query.edit_message_text(
+        admin_card(query.message), reply_markup=kb_admin(user_id, rev_id)
+    )
+
+
+async def _ban(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, rev_id: str):
+    if user_id == ADMIN_ID:
+        await query.answer("Cannot ban yourself.", show_alert=True)
+        return
+    await db.ban(user_id)
+    await query.edit_message_text(
+        admin_card(query.message) + "\n\n⛔ <b>USER BANNED</b>",
+    )
+
+
+# cb_admin action prefix → handler(query, context, uid, rest-of-callback)
+_ADMIN_ACTIONS = {
+    "app":   _approve,
+    "rej":   _reject_prompt,
+    "rr":    _reject_reason,
+    "rback": _reject_back,
+    "ban":   _ban,
+}
+
 # ==============================================================================
 # 🗳️  CHANNEL VOTING
 # ==============================================================================
 
+# Channel messages awaiting their debounced button edit:
+# msg_id -> (rev_id, deep_url). Presence means a flush task is scheduled.
+_vote_pending: Dict[int, Tuple[str, Optional[str]]] = {}
+
+
+async def _flush_vote_markup(bot, chat_id: int, msg_id: int):
+    """Wait out the burst, then redraw the buttons once with the stored counts."""
+    await asyncio.sleep(VOTE_EDIT_DELAY)
+    # Unregister before reading: a vote landing after the read schedules its own flush.
+    # The counters are re-read rather than taken from whichever cast_vote returned
+    # last — concurrent votes can finish out of order, and that one may be stale.
+    rev_id, deep_url = _vote_pending.pop(msg_id)
+    votes = await db.vote_counts(msg_id)
+    try:
+        await bot.edit_message_reply_markup(
+            chat_id, msg_id,
+            reply_markup=kb_channel_post(rev_id, votes["up"], votes["down"], deep_url),
+        )
+    except BadRequest as exc:
+        if "not modified" not in str(exc).lower():   # counts identical to what is shown
+            logging.warning("Vote markup edit failed for %s: %s", msg_id, exc)
+
+
 async def cb_vote(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query     = update.callback_query
-    parts     = query.data.split("|")
-    direction = "up" if parts[0] == "vup" else "down"
-    rev_id    = parts[1]
+    action, _, rev_id = query.data.partition("|")
+    direction = "up" if action == "vup" else "down"
     uid       = query.from_user.id
     msg_id    = query.message.message_id
 
@@ -1394,23 +1821,19 @@ async def cb_vote(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer("You've already voted this way!", show_alert=False)
         return
 
-    old_kb   = query.message.reply_markup.inline_keyboard
-    deep_url = old_kb[1][0].url if len(old_kb) > 1 and old_kb[1] else None
-
-    new_rows = [
-        [
-            InlineKeyboardButton(f"👍 {votes['up']}",   callback_data=f"vup|{rev_id}"),
-            InlineKeyboardButton(f"👎 {votes['down']}", callback_data=f"vdn|{rev_id}"),
-        ]
-    ]
-    if deep_url:
-        new_rows.append([InlineKeyboardButton("➕ Add More About This Teacher", url=deep_url)])
-
-    try:
-        await query.edit_message_reply_markup(InlineKeyboardMarkup(new_rows))
-        await query.answer("✅ Vote recorded!")
-    except BadRequest:
-        await query.answer()
+    deep_url = votes.get("deep")
+    if deep_url is None:   # posted before deep links were stored with the votes
+        old_kb   = query.message.reply_markup.inline_keyboard
+        deep_url = old_kb[1][0].url if len(old_kb) > 1 and old_kb[1] else None
+
+    # Acknowledge now; the markup edit is coalesced with other votes on this post
+    schedule = msg_id not in _vote_pending
+    _vote_pending[msg_id] = (rev_id, deep_url)
+    if schedule:
+        context.application.create_task(
+            _flush_vote_markup(context.bot, query.message.chat_id, msg_id)
+        )
+    await query.answer("✅ Vote recorded!")
 
 # ==============================================================================
 # 🔍  /search  — approved members only
@@ -1422,13 +1845,12 @@ async def cmd_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     if not db.is_approved_member(uid):
-        await update.message.reply_text(S.ERR_SEARCH_ONLY, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(S.ERR_SEARCH_ONLY)
         return
 
     if not context.args:
         await update.message.reply_text(
             "🔍 <b>Teacher Search</b>\n\nUsage: <code>/search Dr. Abebe</code>",
-            parse_mode=ParseMode.HTML,
         )
         return
 
@@ -1437,34 +1859,38 @@ async def cmd_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if not results:
         await update.message.reply_text(
-            f"🔍 No approved reviews found for <b>{html.escape(query_str)}</b>.\n"
+            f"🔍 No approved reviews found for <b>{esc(query_str)}</b>.\n"
             "Check the spelling and try again.",
-            parse_mode=ParseMode.HTML,
         )
         return
 
-    # Group by teacher
-    by_teacher: Dict[str, List[dict]] = {}
+    # One pass: per-teacher rating sum/count, distinct subjects (first-seen order)
+    # and the last two reviews for snippets
+    agg = defaultdict(lambda: {"sum": 0, "n": 0, "subs": {}, "last": deque(maxlen=2)})
     for r in results:
-        by_teacher.setdefault(r["teacher"], []).append(r)
-
-    msg = f"🔍 <b>Results for:</b> <i>{html.escape(query_str)}</i>\n{'─'*32}\n\n"
-    for name, revs in by_teacher.items():
-        avg     = sum(r["rating"] for r in revs) / len(revs)
-        subjects = list({r["subject"] for r in revs})
+        a = agg[r["teacher"]]
+        a["sum"] += r["rating"]
+        a["n"]   += 1
+        a["subs"][r["subject"]] = None
+        a["last"].append(r["content"])
+
+    parts = [f"🔍 <b>Results for:</b> <i>{esc(query_str)}</i>\n{HR}\n\n"]
+    for name, a in agg.items():
+        avg      = a["sum"] / a["n"]
+        subjects = list(a["subs"])
         sub_str  = ", ".join(subjects[:3]) + ("…" if len(subjects) > 3 else "")
 
-        msg += (
-            f"👨‍🏫 <b>{html.escape(name)}</b>\n"
+        parts.append(
+            f"👨‍🏫 <b>{esc(name)}</b>\n"
             f"⭐ <b>Avg Rating:</b> {avg:.1f}/5  {stars_str(round(avg))}\n"
-            f"📊 <b>Reviews:</b> {len(revs)}\n"
-            f"📚 <b>Subjects:</b> {html.escape(sub_str)}\n\n"
+            f"📊 <b>Reviews:</b> {a['n']}\n"
+            f"📚 <b>Subjects:</b> {esc(sub_str)}\n\n"
         )
-        for r in revs[-2:]:
-            snippet = r["content"][:150] + ("…" if len(r["content"]) > 150 else "")
-            msg += f"💬 <i>{html.escape(snippet)}</i>\n\n"
+        for content in a["last"]:
+            snippet = content[:150] + ("…" if len(content) > 150 else "")
+            parts.append(f"💬 <i>{esc(snippet)}</i>\n\n")
 
-    await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
+    await update.message.reply_text("".join(parts))
 
 # ==============================================================================
 # 🏆  /top  — leaderboard
@@ -1484,7 +1910,7 @@ async def cmd_top(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if top:
         for i, t in enumerate(top):
             msg += (
-                f"{medals[i]} <b>{html.escape(t['teacher'])}</b>\n"
+                f"{medals[i]} <b>{esc(t['teacher'])}</b>\n"
                 f"   {stars_str(round(t['avg']))} {t['avg']:.1f}/5"
                 f" — {t['count']} review{'s' if t['count'] != 1 else ''}\n"
             )
@@ -1495,98 +1921,122 @@ async def cmd_top(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if tough:
         for i, c in enumerate(tough):
             msg += (
-                f"{i+1}. <b>{html.escape(c['subject'])}</b>\n"
+                f"{i+1}. <b>{esc(c['subject'])}</b>\n"
                 f"   {c['avg']:.1f}/5 — {c['count']} review{'s' if c['count'] != 1 else ''}\n"
             )
     else:
         msg += "<i>No data yet.</i>\n"
 
-    await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
+    await update.message.reply_text(msg)
 
 # ==============================================================================
 # 📊  ADMIN COMMANDS
 # ==============================================================================
 
 async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_user.id != ADMIN_ID:
-        return
-
-    total_users    = await db.user_count()
-    total_reviews  = await db.review_count()
-    total_members  = await db.member_count()
+    # All four are metadata counts; run them concurrently instead of serially
+    total_users, total_reviews, total_members, pending = await asyncio.gather(
+        db.user_count(), db.review_count(), db.member_count(), db.pending_count()
+    )
     total_banned   = len(db._banned_cache)
-    pending        = await db.pending_count()
     active_sess    = len(_sessions)
 
     msg = (
         f"📊 <b>BOT STATISTICS</b>\n"
-        f"{'─'*30}\n"
+        f"{HR_NARROW}\n"
         f"👥 <b>Total Users:</b>          {total_users}\n"
         f"✅ <b>Approved Reviews:</b>     {total_reviews}\n"
         f"🔓 <b>Approved Members:</b>     {total_members}\n"
         f"⏳ <b>Pending Queue:</b>        {pending}\n"
         f"💬 <b>Active Sessions:</b>      {active_sess}\n"
         f"🚫 <b>Banned Users:</b>         {total_banned}\n"
-        f"{'─'*30}\n"
+        f"{HR_NARROW}\n"
         f"🕐 {datetime.now().strftime('%Y-%m-%d  %H:%M')}"
     )
-    await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
+    await update.message.reply_text(msg)
 
 
 async def cmd_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_user.id != ADMIN_ID:
-        return
     if not context.args:
         await update.message.reply_text(
-            "Usage: <code>/broadcast Your message here</code>", parse_mode=ParseMode.HTML
+            "Usage: <code>/broadcast Your message here</code>"
         )
         return
 
     # BUG FIX 5: don't html.escape admin's own broadcast message
     bcast  = f"📢 <b>Announcement</b>\n\n{' '.join(context.args)}"
-    uids   = await db.all_user_ids()
+    total  = await db.user_count()
     ok = fail = 0
 
     status = await update.message.reply_text(
-        f"📡 Broadcasting to {len(uids)} users…", parse_mode=ParseMode.HTML
+        f"📡 Broadcasting to ~{total} users…"
     )
 
-    for uid in uids:
-        try:
-            await context.bot.send_message(uid, bcast, parse_mode=ParseMode.HTML)
-            ok += 1
-        except (Forbidden, BadRequest):
-            fail += 1
-        except Exception as exc:
-            logging.error("Broadcast [%s]: %s", uid, exc)
-            fail += 1
-        await asyncio.sleep(0.05)
+    sem  = asyncio.Semaphore(BROADCAST_INFLIGHT)
+    loop = asyncio.get_running_loop()
+
+    async def _send(uid: int) -> bool:
+        async with sem:
+            try:
+                await context.bot.send_message(uid, bcast)
+                return True
+            except (Forbidden, BadRequest):
+                return False
+            except TelegramError as exc:
+                logging.error("Broadcast [%s]: %s", uid, exc)
+                return False
+
+    # One-second windows of BROADCAST_RATE sends each, overlapped within the window.
+    # Each window waits for the previous one's second to run out before starting.
+    next_at = loop.time()
+    windows = 0
+
+    async def _window(uids: List[int]):
+        nonlocal ok, fail, next_at, windows
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        next_at  = loop.time() + 1.0
+        results  = await asyncio.gather(*(_send(u) for u in uids))
+        sent     = sum(results)
+        ok      += sent
+        fail    += len(results) - sent
+        windows += 1
+        if windows % 20 == 0:
+            try:
+                await status.edit_text(f"📡 Broadcasting… ✔️ {ok}  ❌ {fail} / ~{total}")
+            except TelegramError:
+                pass
+
+    batch: List[int] = []
+    async for uid in db.iter_user_ids():
+        batch.append(uid)
+        if len(batch) == BROADCAST_RATE:
+            await _window(batch)
+            batch = []
+    if batch:
+        await _window(batch)
 
     await status.edit_text(
         f"✅ <b>Broadcast done</b>\n\n✔️ Sent: {ok}  ❌ Failed: {fail}",
-        parse_mode=ParseMode.HTML,
     )
 
 
 async def cmd_unban(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_user.id != ADMIN_ID:
-        return
     if not context.args:
-        await update.message.reply_text("Usage: <code>/unban USER_ID</code>", parse_mode=ParseMode.HTML)
+        await update.message.reply_text("Usage: <code>/unban USER_ID</code>")
         return
+    # Only the parse is guarded; "²".isdigit() is True but int("²") still raises
     try:
         uid = int(context.args[0])
-        await db.unban(uid)
-        await update.message.reply_text(
-            f"✅ User <code>{uid}</code> has been unbanned.", parse_mode=ParseMode.HTML
-        )
     except ValueError:
-        await update.message.reply_text("⚠️ Invalid user ID.", parse_mode=ParseMode.HTML)
+        await update.message.reply_text("⚠️ Invalid user ID.")
+        return
+    await db.unban(uid)
+    await update.message.reply_text(
+        f"✅ User <code>{uid}</code> has been unbanned."
+    )
 
 
 async def cmd_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_user.id != ADMIN_ID:
-        return
     await update.message.reply_text(
         "🛠️ <b>Admin Commands</b>\n\n"
         "/stats — Dashboard\n"
@@ -1594,130 +2044,328 @@ async def cmd_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/unban [uid] — Unban a user\n"
         "/search [name] — Search reviews\n"
         "/top — Leaderboard\n",
-        parse_mode=ParseMode.HTML,
     )
 
 # ==============================================================================
 # ⚠️  ERROR HANDLER
 # ==============================================================================
 
+async def refresh_caches_job(context: ContextTypes.DEFAULT_TYPE):
+    await db.refresh_caches()
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     logging.error("Update caused exception:", exc_info=context.error)
 
 # ==============================================================================
-# 🌐  FLASK KEEP-ALIVE  (Render.com — must bind $PORT within 60 s)
+# 🌐  KEEP-ALIVE  (Render.com — must bind $PORT within 60 s)
 # ==============================================================================
+# Served by aiohttp on PTB's own event loop: no extra thread competing for the GIL.
 
-web_app = Flask(__name__)
-
-@web_app.route("/")
-def home():
-    return "Bot is alive and running!", 200
+async def web_home(request: web.Request) -> web.Response:
+    return web.Response(text="Bot is alive and running!")
 
-@web_app.route("/health")
-def health():
-    return {
+async def web_health(request: web.Request) -> web.Response:
+    return web.json_response({
         "status":   "ok",
         "sessions": len(_sessions),
         "banned":   len(db._banned_cache),
-    }, 200
+    })
+
+async def keep_alive() -> web.AppRunner:
+    web_app = web.Application()
+    web_app.router.add_get("/",       web_home)
+    web_app.router.add_get("/health", web_health)
+    # No access log: Render's probes would otherwise format and emit a line each hit
+    runner = web.AppRunner(web_app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", PORT).start()
+    logging.info("Keep-alive server started on PORT=%s", PORT)
+    return runner
+
+# ==============================================================================
+# 🎛️  HANDLER FILTERS & CALLBACK PATTERNS  (compiled once at import)
+# ==============================================================================
+
+def _button(label: str) -> filters.Text:
+    """Exact match on a reply-keyboard label — a plain string comparison, no regex."""
+    return filters.Text((label,))
+
+FLT_WRITE     = _button(S.BTN_WRITE)
+FLT_MATERIALS = _button(S.BTN_MATERIALS)
+# The ❌ button; /cancel itself stays a CommandHandler (bot-username check, case-folding)
+FLT_CANCEL    = _button(S.BTN_CANCEL)
 
-def _run_web():
-    port = int(os.environ.get("PORT", 8080))
-    web_app.run(host="0.0.0.0", port=port, use_reloader=False)
+# Free-text answers in the conversation states — one shared filter tree for all five
+FLT_TEXT      = filters.TEXT & ~filters.COMMAND
 
-def keep_alive():
-    t = threading.Thread(target=_run_web, daemon=True)
-    t.start()
-    logging.info("Flask keep-alive started on PORT=%s", os.environ.get("PORT", 8080))
+# Admin commands are dropped for everyone else at dispatch, before a task is scheduled
+FLT_ADMIN     = filters.User(user_id=ADMIN_ID)
+
+PAT_SUBJECT = re.compile(r"^(?:spage|subj)\||^conv\|cancel$")
+PAT_RATE    = re.compile(r"^rate\|")
+PAT_MANAGE  = re.compile(r"^d(edit|del|submit|add)")
+
+# ST_SUBJECT's pager, subject buttons and cancel: one regex test, then a dict lookup
+_SUBJECT_ROUTES = {
+    "spage": cb_subject_page,
+    "subj":  cb_subject_select,
+    "conv":  cb_conv_cancel,
+}
+
+async def cb_subject_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    return await _SUBJECT_ROUTES[update.callback_query.data.partition("|")[0]](update, context)
+
+# Admin-card and channel-vote buttons: one handler, routed on the prefix before "|"
+# with a dict lookup instead of a regex per pattern for every callback query
+_CB_ROUTES = {
+    "app":   cb_admin,
+    "rej":   cb_admin,
+    "rr":    cb_admin,
+    "rback": cb_admin,
+    "ban":   cb_admin,
+    "vup":   cb_vote,
+    "vdn":   cb_vote,
+}
+
+async def cb_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    handler = _CB_ROUTES.get(update.callback_query.data.partition("|")[0])
+    if handler:
+        await handler(update, context)
+
+# ==============================================================================
+# 🚦  UPDATE PROCESSOR  — concurrent across users, serial within one
+# ==============================================================================
+
+class _BackloggedQueue(asyncio.Queue):
+    """
+    The Application's update queue. With concurrent updates PTB turns every update it
+    dequeues straight into a task, so a bounded queue alone never fills — the backlog
+    just moves into tasks. get() therefore first takes a backlog slot (released by
+    PerUserUpdateProcessor when the update finishes): once the processor is saturated
+    the fetcher waits here, the queue fills, and the Updater's put() pauses getUpdates.
+    """
+
+    def __init__(self, backlog: asyncio.Semaphore, maxsize: int):
+        super().__init__(maxsize)
+        self._backlog = backlog
+
+    async def get(self):
+        await self._backlog.acquire()
+        try:
+            return await super().get()
+        except BaseException:
+            self._backlog.release()
+            raise
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Lets a slow Mongo/Bot API round trip for one user overlap with everyone else's
+    updates, while each user's own updates still run strictly in arrival order —
+    the ConversationHandler state and the in-memory Session are not safe to touch
+    from two concurrent handlers of the same user. At most max_backlog updates are
+    in flight (running or waiting on their user) when fed through update_queue().
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_backlog: int):
+        # BaseUpdateProcessor.process_update() takes its semaphore *before* calling
+        # do_process_update(), i.e. while the update may still be queued behind its
+        # user's lock — a burst from one user would pin every slot and stall everyone
+        # else. So that semaphore is left unbounded and the real limit is enforced
+        # below, only around updates that have cleared their user's lock.
+        super().__init__(sys.maxsize)
+        self._running = asyncio.Semaphore(max_concurrent_updates)
+        self._backlog = asyncio.Semaphore(max_backlog)
+        # uid → [lock, holders+waiters]; entries are dropped when the last one leaves
+        self._locks: Dict[int, list] = {}
+
+    def update_queue(self, maxsize: int) -> asyncio.Queue:
+        """The queue to hand ApplicationBuilder.update_queue(); it applies the backlog cap."""
+        return _BackloggedQueue(self._backlog, maxsize)
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        try:
+            await self._run_in_user_lane(update, coroutine)
+        finally:
+            self._backlog.release()   # taken by _BackloggedQueue.get()
+
+    async def _run_in_user_lane(self, update: object, coroutine) -> None:
+        user = update.effective_user if isinstance(update, Update) else None
+        if user is None:
+            async with self._running:
+                await coroutine
+            return
+        entry = self._locks.get(user.id)
+        if entry is None:
+            entry = self._locks[user.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0], self._running:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[user.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+# ==============================================================================
+# 📡  BOT API TRANSPORT  — orjson for every Telegram response
+# ==============================================================================
+
+class OrjsonRequest(HTTPXRequest):
+    """HTTPXRequest that decodes Bot API responses (getUpdates batches above all) with orjson."""
+
+    @staticmethod
+    def parse_json_payload(payload: bytes) -> dict:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            # Invalid UTF-8 or JSON: let PTB's lenient decoder log it and raise as usual
+            return HTTPXRequest.parse_json_payload(payload)
+
+# ==============================================================================
+# 🧩  HANDLERS  (built once at import; main() only registers them)
+# ==============================================================================
+
+# BUG FIX 4: ST_MANAGE pattern fixed to r'^d(edit|del|submit|add)'
+CONV_HANDLER = ConversationHandler(
+    entry_points=[
+        CommandHandler("start", cmd_start),
+        MessageHandler(FLT_WRITE, handler_start_review),
+    ],
+    states={
+        ST_STREAM:  [MessageHandler(FLT_TEXT, handler_stream)],
+        ST_YEAR:    [MessageHandler(FLT_TEXT, handler_year)],
+        ST_SUBJECT: [CallbackQueryHandler(cb_subject_router, pattern=PAT_SUBJECT)],
+        ST_TEACHER: [MessageHandler(FLT_TEXT, handler_teacher)],
+        ST_RATING:  [CallbackQueryHandler(cb_rating, pattern=PAT_RATE)],
+        ST_CONTENT: [MessageHandler(FLT_TEXT, handler_content)],
+        ST_BATCH:   [MessageHandler(FLT_TEXT, handler_batch)],
+        ST_MANAGE:  [CallbackQueryHandler(cb_manage_drafts, pattern=PAT_MANAGE)],
+        ConversationHandler.TIMEOUT: [TypeHandler(Update, on_timeout)],
+    },
+    fallbacks=[
+        CommandHandler("cancel", do_cancel),
+        MessageHandler(FLT_CANCEL, do_cancel),
+    ],
+    per_user=True,
+    allow_reentry=True,
+    conversation_timeout=CONVERSATION_TIMEOUT,
+)
+
+AUX_HANDLERS = [
+    MessageHandler(FLT_MATERIALS, cmd_materials),
+
+    # Public commands — read-only aggregations that never touch the Session, so they run
+    # as background tasks and don't hold the user's update lane while Mongo answers
+    CommandHandler("search", cmd_search, block=False),
+    CommandHandler("top",    cmd_top,    block=False),
+
+    # Admin commands
+    CommandHandler("stats",     cmd_stats,     filters=FLT_ADMIN),
+    CommandHandler("broadcast", cmd_broadcast, filters=FLT_ADMIN),
+    CommandHandler("unban",     cmd_unban,     filters=FLT_ADMIN),
+    CommandHandler("admin",     cmd_admin,     filters=FLT_ADMIN),
+
+    # Callbacks outside the conversation (admin card + channel votes)
+    CallbackQueryHandler(cb_router),
+]
 
 # ==============================================================================
 # 🔌  MAIN
 # ==============================================================================
 
+# Startup banner: one log record instead of eleven flushed print() writes
+BANNER = "\n".join((
+    "=" * 62,
+    "  TEACHER REVIEW BOT v12.0 — MongoDB Atlas Edition",
+    "  ✅ aiohttp keep-alive ($PORT, Render compatible)",
+    "  ✅ MongoDB Atlas persistence (Motor async driver)",
+    "  ✅ 5 logic bugs fixed from v11.0",
+    "  ✅ Per-user vote tracking in MongoDB",
+    "  ✅ Structured pending contexts (no text parsing)",
+    "  ✅ Deep linking + threaded channel replies",
+    "  ✅ Paginated subjects, draft management",
+    "  ✅ Profanity filter, rate limit, /search, /top",
+    "=" * 62,
+))
+
+
 def main():
     logging.basicConfig(
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
         level=logging.INFO,
     )
-    print("=" * 62)
-    print("  TEACHER REVIEW BOT v12.0 — MongoDB Atlas Edition")
-    print("  ✅ Flask keep-alive ($PORT, Render compatible)")
-    print("  ✅ MongoDB Atlas persistence (Motor async driver)")
-    print("  ✅ 5 logic bugs fixed from v11.0")
-    print("  ✅ Per-user vote tracking in MongoDB")
-    print("  ✅ Structured pending contexts (no text parsing)")
-    print("  ✅ Deep linking + threaded channel replies")
-    print("  ✅ Paginated subjects, draft management")
-    print("  ✅ Profanity filter, rate limit, /search, /top")
-    print("=" * 62)
-
-    # 1. Start Flask FIRST — Render kills app if port not bound in 60 s
-    keep_alive()
-
-    # 2. Build application
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
-
-    # 3. Warm MongoDB caches (runs once before polling starts)
+    logging.info("\n%s", BANNER)
+
+    # 1. Build application
+    # Every message is HTML — set it once instead of on each send/edit call.
+    # Updates from different users run concurrently; the outbound pool is sized so
+    # each in-flight update can get a connection without waiting on pool_timeout.
+    # Dispatched updates are capped at UPDATE_BACKLOG; past that the bounded queue fills
+    # and getUpdates pauses, instead of buffering stale updates in memory without limit.
+    processor   = PerUserUpdateProcessor(UPDATE_CONCURRENCY, UPDATE_BACKLOG)
+    application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .defaults(Defaults(parse_mode=ParseMode.HTML))
+        .concurrent_updates(processor)
+        .request(OrjsonRequest(connection_pool_size=BOT_POOL_SIZE, pool_timeout=10.0))
+        .get_updates_request(OrjsonRequest())
+        .update_queue(processor.update_queue(UPDATE_QUEUE_SIZE))
+        .build()
+    )
+
+    # 2. Bind $PORT, then warm MongoDB caches (runs once before polling starts).
+    #    The port goes FIRST — Render kills the app if it isn't bound within 60 s.
+    web_runner: Optional[web.AppRunner] = None
+
     async def post_init(app):
+        nonlocal web_runner
+        web_runner = await keep_alive()
         await db.init()
         logging.info("MongoDB initialised successfully.")
-
-    application.post_init = post_init
-
-    # 4. Conversation handler
-    # BUG FIX 4: ST_MANAGE pattern fixed to r'^d(edit|del|submit|add)'
-    conv = ConversationHandler(
-        entry_points=[
-            CommandHandler("start", cmd_start),
-            MessageHandler(filters.Regex(f"^{re.escape(S.BTN_WRITE)}$"), handler_start_review),
-        ],
-        states={
-            ST_STREAM:  [MessageHandler(filters.TEXT & ~filters.COMMAND, handler_stream)],
-            ST_YEAR:    [MessageHandler(filters.TEXT & ~filters.COMMAND, handler_year)],
-            ST_SUBJECT: [
-                CallbackQueryHandler(cb_subject_page,   pattern=r"^spage\|"),
-                CallbackQueryHandler(cb_subject_select, pattern=r"^subj\|"),
-                CallbackQueryHandler(cb_conv_cancel,    pattern=r"^conv\|cancel$"),
-            ],
-            ST_TEACHER: [MessageHandler(filters.TEXT & ~filters.COMMAND, handler_teacher)],
-            ST_RATING:  [CallbackQueryHandler(cb_rating, pattern=r"^rate\|")],
-            ST_CONTENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handler_content)],
-            ST_BATCH:   [MessageHandler(filters.TEXT & ~filters.COMMAND, handler_batch)],
-            ST_MANAGE:  [CallbackQueryHandler(cb_manage_drafts, pattern=r"^d(edit|del|submit|add)")],
-        },
-        fallbacks=[
-            CommandHandler("cancel", do_cancel),
-            MessageHandler(filters.Regex(f"^{re.escape(S.BTN_CANCEL)}$"), do_cancel),
-        ],
-        per_user=True,
-        allow_reentry=True,
-    )
-
-    application.add_handler(conv)
-    application.add_handler(
-        MessageHandler(filters.Regex(f"^{re.escape(S.BTN_MATERIALS)}$"), cmd_materials)
+        # Everything alive now (catalogue tables, prebuilt keyboards, caches, handlers) lives
+        # for the whole process — move it out of the collector's view so the churn of
+        # short-lived Session/Draft objects doesn't keep rescanning it.
+        gc.collect()
+        gc.freeze()
+
+    # Close the Motor pool on SIGTERM (Render redeploys) once handlers have drained
+    async def post_shutdown(app):
+        if web_runner is not None:
+            await web_runner.cleanup()
+        db.close()
+
+    application.post_init     = post_init
+    application.post_shutdown = post_shutdown
+
+    # Bans/approvals written by another instance (or by hand in Atlas) show up within
+    # CACHE_REFRESH_SECS; local writes update the caches immediately.
+    application.job_queue.run_repeating(
+        refresh_caches_job, interval=CACHE_REFRESH_SECS, first=CACHE_REFRESH_SECS
     )
 
-    # Public commands
-    application.add_handler(CommandHandler("search", cmd_search))
-    application.add_handler(CommandHandler("top",    cmd_top))
-
-    # Admin commands
-    application.add_handler(CommandHandler("stats",     cmd_stats))
-    application.add_handler(CommandHandler("broadcast", cmd_broadcast))
-    application.add_handler(CommandHandler("unban",     cmd_unban))
-    application.add_handler(CommandHandler("admin",     cmd_admin))
-
-    # Callbacks (specific patterns first)
-    application.add_handler(CallbackQueryHandler(cb_admin, pattern=r"^(app|rej|ban|rr|rback)\|"))
-    application.add_handler(CallbackQueryHandler(cb_vote,  pattern=r"^v(up|dn)\|"))
+    # 3. Handlers (constructed at import — see HANDLERS above)
+    application.add_handler(CONV_HANDLER)
+    application.add_handlers(AUX_HANDLERS)
 
     application.add_error_handler(error_handler)
 
-    # 5. Start polling
-    print("✅ Polling started.")
-    application.run_polling(drop_pending_updates=True)
+    # 4. Start polling — only the two update types any handler above consumes, so
+    #    Telegram filters out edits, channel posts, member updates etc. server-side.
+    #    A long hold returns as soon as an update arrives, so idle polls drop ~5× for free.
+    logging.info("✅ Polling started.")
+    application.run_polling(
+        drop_pending_updates=True,
+        allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
+        timeout=POLL_TIMEOUT,
+    )
 
 
 if __name__ == "__main__":
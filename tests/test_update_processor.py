@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import MagicMock
+
+from telegram import Update
+
+from main import PerUserUpdateProcessor
+
+
+def _update(uid: int) -> Update:
+    update = MagicMock(spec=Update)
+    update.effective_user = MagicMock(id=uid)
+    return update
+
+
+def test_flooding_user_does_not_starve_others():
+    async def scenario():
+        processor = PerUserUpdateProcessor(4, 100)
+        release   = asyncio.Event()
+        done      = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        async def other():
+            done.set()
+
+        # Far more updates from one user than there are concurrency slots
+        flood = [
+            asyncio.create_task(processor.process_update(_update(1), blocked()))
+            for _ in range(32)
+        ]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(processor.process_update(_update(2), other()), timeout=1)
+        assert done.is_set()
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*flood), timeout=1)
+        assert not processor._locks
+
+    asyncio.run(scenario())
+
+
+def test_same_user_runs_in_arrival_order():
+    async def scenario():
+        processor = PerUserUpdateProcessor(4, 100)
+        log       = []
+
+        async def job(tag):
+            log.append(f"{tag}<")
+            await asyncio.sleep(0.01)
+            log.append(f"{tag}>")
+
+        await asyncio.gather(*(processor.process_update(_update(1), job(i)) for i in range(3)))
+        assert log == ["0<", "0>", "1<", "1>", "2<", "2>"]
+
+    asyncio.run(scenario())
+
+
+def test_backlog_cap_stops_fetching_and_fills_queue():
+    async def scenario():
+        processor = PerUserUpdateProcessor(2, 5)
+        queue     = processor.update_queue(10)
+        release   = asyncio.Event()
+        tasks     = []
+
+        async def blocked():
+            await release.wait()
+
+        async def fetcher():
+            # Mirrors Application's fetch loop under concurrent_updates: no await on the task
+            while True:
+                update, coroutine = await queue.get()
+                tasks.append(asyncio.create_task(processor.process_update(update, coroutine)))
+
+        fetch = asyncio.create_task(fetcher())
+        for i in range(15):
+            await asyncio.wait_for(queue.put((_update(i % 3), blocked())), timeout=1)
+        await asyncio.sleep(0.05)
+
+        # Only max_backlog updates were taken off the queue; the rest wait in it
+        assert len(tasks) == 5
+        assert queue.qsize() == 10
+
+        # The queue is full, so the producer (the Updater's put) now blocks
+        extra = blocked()
+        try:
+            await asyncio.wait_for(queue.put((_update(9), extra)), timeout=0.05)
+            assert False, "put() should block once the backlog is saturated"
+        except asyncio.TimeoutError:
+            extra.close()
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert len(tasks) == 15 and queue.empty()
+        await asyncio.gather(*tasks)
+        assert not processor._locks
+
+        fetch.cancel()
+
+    asyncio.run(scenario())